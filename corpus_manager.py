@@ -4,650 +4,1096 @@ Handles multiple corpus sources for context-aware translation
 """
 
 import os
+import sys
+import atexit
 import json
-import pandas as pd
+import pickle
+import functools
+import hashlib
+import importlib.util
+import tempfile
+import threading
 import numpy as np
 from sentence_transformers import SentenceTransformer
+import torch
 import faiss
-from datasets import load_dataset
+import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
 from typing import List, Dict, Tuple, Optional
-import pickle
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON parsing, the stdlib json is used otherwise
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Languages supported by every corpus source
+_ALL_LANGS: Tuple[str, ...] = ('en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru')
+
+# Display names for language codes, used in translation prompts
+_LANGUAGE_NAMES = {
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ja': 'Japanese',
+    'ko': 'Korean',
+    'zh': 'Chinese',
+    'ar': 'Arabic',
+    'hi': 'Hindi',
+    'ur': 'Urdu',
+    'ru': 'Russian',
+    'nl': 'Dutch',
+    'sv': 'Swedish',
+    'no': 'Norwegian',
+    'da': 'Danish',
+    'pl': 'Polish',
+    'tr': 'Turkish',
+    'he': 'Hebrew',
+    'th': 'Thai',
+    'vi': 'Vietnamese'
+}
+
+# Sentence encoder used for every corpus and query
+_ENCODER_NAME = 'all-MiniLM-L6-v2'
+
+# Corpora below this size are searched by brute force; larger ones use an HNSW graph
+_HNSW_MIN_VECTORS = 2000
+
+# Sample entries for every corpus in _CORPUS_SOURCES, written out by create_sample_corpora
+_SAMPLE_CORPORA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sample_corpora.json')
+
+# Most recent query embeddings kept by CorpusManager.encode_queries
+_QUERY_CACHE_SIZE = 2048
+
+# Query embeddings kept across runs by CorpusManager(persist_query_embeddings=True): the
+# most recently added _QUERY_STORE_SIZE. One store per process, read on first use; new
+# entries are merged into the file every _QUERY_STORE_SAVE_EVERY additions and at exit
+_QUERY_STORE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'geospeak', 'query_embeddings.npz')
+_QUERY_STORE_SIZE = 20000
+_QUERY_STORE_SAVE_EVERY = 1024
+_QUERY_STORE_LOCK = threading.Lock()
+_QUERY_STORE_WRITE_LOCK = threading.Lock()
+_query_store: 'Optional[OrderedDict[str, np.ndarray]]' = None
+# Entries added since the last save, oldest first
+_query_store_added: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
+# get_context_examples fetches at least this many hits per query and keeps them for
+# the most recent queries, so later calls with a different max_examples reuse them
+_CONTEXT_HITS_K = 10
+_CONTEXT_CACHE_SIZE = 512
+
+# Ids in the merged all-corpora index: corpus number in the high bits, row in the low 48
+_CORPUS_ID_SHIFT = 48
+_ROW_MASK = (1 << _CORPUS_ID_SHIFT) - 1
+
+# Very large corpora are stored product-quantized (LASER-style OPQ + IVF + PQ)
+_COMPRESSED_MIN_VECTORS = 100000
+_COMPRESSED_INDEX_FACTORY = "OPQ32_64,IVF4096,PQ32"
+_COMPRESSED_TRAIN_SAMPLE = 40000
+_COMPRESSED_NPROBE = 16
+
+# Rows copied per step when gathering out of a disk-backed embedding matrix
+_GATHER_CHUNK_ROWS = 65536
+
+def _read_json(path: str):
+    """Parse a JSON file, with orjson straight from the raw bytes when it is installed"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _write_json(path: str, obj):
+    """Write compact UTF-8 JSON in one write, serialized by orjson when it is installed"""
+    if orjson is not None:
+        raw = orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        raw = (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(raw)
+
+def _read_query_store() -> 'OrderedDict[str, np.ndarray]':
+    """Read the saved query embeddings (npz, no pickle), oldest first"""
+    try:
+        with np.load(_QUERY_STORE_PATH) as store:
+            return OrderedDict(zip(store['keys'].tolist(), store['embeddings']))
+    except FileNotFoundError:
+        return OrderedDict()
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable query embedding cache {_QUERY_STORE_PATH}: {e}")
+        return OrderedDict()
+
+def _shared_query_store() -> 'OrderedDict[str, np.ndarray]':
+    """The process-wide query store, read from disk on first use"""
+    global _query_store
+    with _QUERY_STORE_LOCK:
+        if _query_store is None:
+            _query_store = _read_query_store()
+            atexit.register(_save_query_store)
+        return _query_store
+
+def _add_to_query_store(entries: Dict[str, np.ndarray]):
+    """Add new query embeddings, saving once enough have accumulated"""
+    with _QUERY_STORE_LOCK:
+        for key, embedding in entries.items():
+            _query_store[key] = embedding
+            _query_store_added[key] = embedding
+        while len(_query_store) > _QUERY_STORE_SIZE:
+            _query_store.popitem(last=False)
+        while len(_query_store_added) > _QUERY_STORE_SIZE:
+            _query_store_added.popitem(last=False)
+        save_now = len(_query_store_added) >= _QUERY_STORE_SAVE_EVERY
+    if save_now:
+        _save_query_store()
+
+def _save_query_store():
+    """Merge the entries added since the last save into the file, replacing it atomically.
+    
+    The file is re-read first, so entries saved meanwhile by other processes are kept.
+    """
+    with _QUERY_STORE_WRITE_LOCK:
+        with _QUERY_STORE_LOCK:
+            added = list(_query_store_added.items())
+            _query_store_added.clear()
+        if not added:
+            return
+        
+        store = _read_query_store()
+        for key, embedding in added:
+            store.pop(key, None)
+            store[key] = embedding
+        while len(store) > _QUERY_STORE_SIZE:
+            store.popitem(last=False)
+        
+        store_dir = os.path.dirname(_QUERY_STORE_PATH)
+        os.makedirs(store_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=store_dir, prefix='query_embeddings.', suffix='.tmp', delete=False) as f:
+            try:
+                np.savez(f, keys=np.array(list(store)), embeddings=np.stack(list(store.values())))
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, _QUERY_STORE_PATH)
+
+@functools.lru_cache(maxsize=4)
+def _get_encoder(name: str, device: str, dtype: str, backend: str = 'torch',
+                 file_name: Optional[str] = None, max_seq_length: Optional[int] = None) -> SentenceTransformer:
+    """Return the process-wide encoder for (name, device, dtype, backend, max_seq_length).
+    
+    Every CorpusManager in the process shares one copy of the weights. This is
+    safe because encode() keeps no per-call state on the model and runs under
+    torch.inference_mode().
+    """
+    if backend == 'onnx':
+        model = SentenceTransformer(name, device=device, backend='onnx', model_kwargs={'file_name': file_name})
+    else:
+        model = SentenceTransformer(name, device=device)
+        if dtype == 'float16':
+            # Half precision halves activation bandwidth on the GPU
+            model.half()
+    
+    if max_seq_length is not None:
+        model.max_seq_length = max_seq_length
+    return model
+
 class CorpusManager:
-    def __init__(self, corpus_dir="./corpus_data", vector_dim=384):
+    # Corpus sources are static metadata, shared by every instance
+    _CORPUS_SOURCES = {
+        'opus_opensubtitles': {
+            'name': 'OpenSubtitles',
+            'description': 'Movie/TV subtitles - conversational language',
+            'domain': 'conversational',
+            'languages': _ALL_LANGS
+        },
+        'medical_terminology': {
+            'name': 'Medical Terms',
+            'description': 'Medical terminology and healthcare translations',
+            'domain': 'medical',
+            'languages': _ALL_LANGS
+        },
+        'business_common': {
+            'name': 'Business Common',
+            'description': 'Common business phrases and terminology',
+            'domain': 'business',
+            'languages': _ALL_LANGS
+        },
+        'technical_computing': {
+            'name': 'Technical Computing',
+            'description': 'Programming and technical terminology',
+            'domain': 'technical',
+            'languages': _ALL_LANGS
+        },
+        'news_current': {
+            'name': 'News & Current Events',
+            'description': 'News articles and current affairs',
+            'domain': 'news',
+            'languages': _ALL_LANGS
+        },
+        'legal_formal': {
+            'name': 'Legal & Formal',
+            'description': 'Legal documents, contracts, and formal communications',
+            'domain': 'legal',
+            'languages': _ALL_LANGS
+        },
+        'academic_research': {
+            'name': 'Academic & Research',
+            'description': 'Academic papers, research terminology, and scholarly language',
+            'domain': 'academic',
+            'languages': _ALL_LANGS
+        },
+        'travel_tourism': {
+            'name': 'Travel & Tourism',
+            'description': 'Travel phrases, tourism, hotels, and transportation',
+            'domain': 'travel',
+            'languages': _ALL_LANGS
+        },
+        'culinary_food': {
+            'name': 'Culinary & Food',
+            'description': 'Food, cooking, restaurants, and culinary terminology',
+            'domain': 'culinary',
+            'languages': _ALL_LANGS
+        },
+        'education_learning': {
+            'name': 'Education & Learning',
+            'description': 'Educational content, classroom language, and learning materials',
+            'domain': 'education',
+            'languages': _ALL_LANGS
+        },
+        'finance_banking': {
+            'name': 'Finance & Banking',
+            'description': 'Financial services, banking, investments, and economic terms',
+            'domain': 'finance',
+            'languages': _ALL_LANGS
+        },
+        'sports_fitness': {
+            'name': 'Sports & Fitness',
+            'description': 'Sports terminology, fitness, and athletic activities',
+            'domain': 'sports',
+            'languages': _ALL_LANGS
+        },
+        'automotive_transport': {
+            'name': 'Automotive & Transport',
+            'description': 'Cars, transportation, mechanics, and automotive industry',
+            'domain': 'automotive',
+            'languages': _ALL_LANGS
+        },
+        'real_estate': {
+            'name': 'Real Estate',
+            'description': 'Property, real estate, housing, and rental terminology',
+            'domain': 'realestate',
+            'languages': _ALL_LANGS
+        },
+        'arts_culture': {
+            'name': 'Arts & Culture',
+            'description': 'Art, music, literature, and cultural expressions',
+            'domain': 'arts',
+            'languages': _ALL_LANGS
+        },
+        'government_politics': {
+            'name': 'Government & Politics',
+            'description': 'Political terminology, government services, and civic language',
+            'domain': 'politics',
+            'languages': _ALL_LANGS
+        },
+        'social_media': {
+            'name': 'Social Media',
+            'description': 'Social media language, internet slang, and digital communication',
+            'domain': 'social',
+            'languages': _ALL_LANGS
+        },
+        'environmental_science': {
+            'name': 'Environmental Science',
+            'description': 'Environment, climate, ecology, and sustainability terminology',
+            'domain': 'environment',
+            'languages': _ALL_LANGS
+        },
+        'religious_spiritual': {
+            'name': 'Religious & Spiritual',
+            'description': 'Religious texts, spiritual concepts, and faith-based language',
+            'domain': 'religious',
+            'languages': _ALL_LANGS
+        },
+        'pharmaceutical': {
+            'name': 'Pharmaceutical',
+            'description': 'Drug names, pharmacy, medication instructions, and pharmaceutical industry',
+            'domain': 'pharmaceutical',
+            'languages': _ALL_LANGS
+        }
+    }
+
+    def __init__(self, corpus_dir="./corpus_data", vector_dim=384, use_compressed_index=True, backend='onnx',
+                 device: Optional[str] = None, max_seq_length: int = 64, persist_query_embeddings: bool = False):
         self.corpus_dir = corpus_dir
         self.vector_dim = vector_dim
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.use_compressed_index = use_compressed_index
+        self.backend = backend
+        # Corpus phrases are a dozen tokens at most; longer queries are truncated
+        self.max_seq_length = max_seq_length
+        self._device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self._encoder_future: Optional[Future] = None
         self.corpora = {}
         self.indexes = {}
-        self.metadata = {}
+        # CPU copies of self.indexes (the same objects when not on GPU), read when merging
+        self._host_indexes: Dict[str, faiss.Index] = {}
+        self._meta_tables: Dict[str, pa.Table] = {}
+        # Languages with at least one indexed entry, per corpus
+        self._corpus_languages: Dict[str, frozenset] = {}
+        self._index_build_lock = threading.Lock()
+        # Decoded (N, d) vectors of exhaustive-tier indexes, scanned directly by top1
+        self._top1_matrices: Dict[str, np.ndarray] = {}
+        
+        # Normalized query embeddings, least recently used first
+        self._query_cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # Scratch query matrix reused by search_batch, one per serving thread
+        self._query_buffers = threading.local()
+        
+        # The process-wide store of query embeddings saved across runs, keyed by
+        # _query_key; None unless persisting
+        self._query_store: 'Optional[OrderedDict[str, np.ndarray]]' = _shared_query_store() if persist_query_embeddings else None
+        
+        # Rendered get_context_examples lines keyed by (corpus, row, target language);
+        # '' marks rows lacking English or the target language
+        self._rendered_examples: Dict[Tuple[str, int, str], str] = {}
+        
+        # Top hits per get_context_examples query: (k searched, hits), least recently used first
+        self._context_hits: 'OrderedDict[str, Tuple[int, List[Dict]]]' = OrderedDict()
+        self._context_hits_lock = threading.Lock()
+        
+        # Parsed corpus JSON keyed by name, with the file mtime it was read at
+        self._corpus_cache: Dict[str, Tuple[float, List[Dict]]] = {}
+        
+        # Merged index over every loaded corpus, rebuilt lazily after indexes change
+        self._global_index: Optional[faiss.Index] = None
+        self._global_lock = threading.Lock()
+        self._corpus_ids: Dict[str, int] = {}
+        self._corpus_names: List[str] = []
         
         # Create corpus directory
         os.makedirs(corpus_dir, exist_ok=True)
-        
+
         # Initialize corpus sources
-        self.corpus_sources = {
-            'opus_opensubtitles': {
-                'name': 'OpenSubtitles',
-                'description': 'Movie/TV subtitles - conversational language',
-                'domain': 'conversational',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'medical_terminology': {
-                'name': 'Medical Terms',
-                'description': 'Medical terminology and healthcare translations',
-                'domain': 'medical',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'business_common': {
-                'name': 'Business Common',
-                'description': 'Common business phrases and terminology',
-                'domain': 'business',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'technical_computing': {
-                'name': 'Technical Computing',
-                'description': 'Programming and technical terminology',
-                'domain': 'technical',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'news_current': {
-                'name': 'News & Current Events',
-                'description': 'News articles and current affairs',
-                'domain': 'news',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'legal_formal': {
-                'name': 'Legal & Formal',
-                'description': 'Legal documents, contracts, and formal communications',
-                'domain': 'legal',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'academic_research': {
-                'name': 'Academic & Research',
-                'description': 'Academic papers, research terminology, and scholarly language',
-                'domain': 'academic',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'travel_tourism': {
-                'name': 'Travel & Tourism',
-                'description': 'Travel phrases, tourism, hotels, and transportation',
-                'domain': 'travel',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'culinary_food': {
-                'name': 'Culinary & Food',
-                'description': 'Food, cooking, restaurants, and culinary terminology',
-                'domain': 'culinary',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'education_learning': {
-                'name': 'Education & Learning',
-                'description': 'Educational content, classroom language, and learning materials',
-                'domain': 'education',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'finance_banking': {
-                'name': 'Finance & Banking',
-                'description': 'Financial services, banking, investments, and economic terms',
-                'domain': 'finance',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'sports_fitness': {
-                'name': 'Sports & Fitness',
-                'description': 'Sports terminology, fitness, and athletic activities',
-                'domain': 'sports',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'automotive_transport': {
-                'name': 'Automotive & Transport',
-                'description': 'Cars, transportation, mechanics, and automotive industry',
-                'domain': 'automotive',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'real_estate': {
-                'name': 'Real Estate',
-                'description': 'Property, real estate, housing, and rental terminology',
-                'domain': 'realestate',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'arts_culture': {
-                'name': 'Arts & Culture',
-                'description': 'Art, music, literature, and cultural expressions',
-                'domain': 'arts',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'government_politics': {
-                'name': 'Government & Politics',
-                'description': 'Political terminology, government services, and civic language',
-                'domain': 'politics',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'social_media': {
-                'name': 'Social Media',
-                'description': 'Social media language, internet slang, and digital communication',
-                'domain': 'social',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'environmental_science': {
-                'name': 'Environmental Science',
-                'description': 'Environment, climate, ecology, and sustainability terminology',
-                'domain': 'environment',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'religious_spiritual': {
-                'name': 'Religious & Spiritual',
-                'description': 'Religious texts, spiritual concepts, and faith-based language',
-                'domain': 'religious',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            },
-            'pharmaceutical': {
-                'name': 'Pharmaceutical',
-                'description': 'Drug names, pharmacy, medication instructions, and pharmaceutical industry',
-                'domain': 'pharmaceutical',
-                'languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh', 'ar', 'hi', 'ur', 'ru']
-            }
-        }
+        self.corpus_sources = self._CORPUS_SOURCES
+
+    @functools.cached_property
+    def embedding_model(self) -> SentenceTransformer:
+        """Sentence encoder, loaded on first use so metadata-only callers skip it"""
+        if self._encoder_future is not None:
+            return self._encoder_future.result()
+        return self._load_encoder()
     
-    def create_sample_corpora(self):
-        """Create sample corpus data for demonstration"""
-        logger.info("Creating sample corpora...")
+    def preload_encoder(self):
+        """Start loading the encoder on a background thread, overlapping it with corpus I/O"""
+        if self._encoder_future is not None or 'embedding_model' in self.__dict__:
+            return
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encoder-preload')
+        self._encoder_future = executor.submit(self._load_encoder)
+        executor.shutdown(wait=False)
+    
+    def _load_encoder(self) -> SentenceTransformer:
+        """Load the encoder on the configured backend"""
+        dtype = 'float16' if self._device == 'cuda' else 'float32'
+        if self.backend == 'onnx':
+            model = self._load_onnx_encoder(dtype)
+            if model is not None:
+                return model
         
-        # OpenSubtitles - Conversational
-        opensubtitles_data = [
-            {"en": "Hello, how are you?", "es": "Hola, ¿cómo estás?", "fr": "Salut, comment ça va?", "de": "Hallo, wie geht es dir?", "ur": "ہیلو، آپ کیسے ہیں؟"},
-            {"en": "Nice to meet you!", "es": "¡Encantado de conocerte!", "fr": "Ravi de vous rencontrer!", "de": "Freut mich, dich kennenzulernen!", "ur": "آپ سے مل کر خوشی ہوئی!"},
-            {"en": "What's your name?", "es": "¿Cómo te llamas?", "fr": "Comment tu t'appelles?", "de": "Wie heißt du?", "ur": "آپ کا نام کیا ہے؟"},
-            {"en": "I'm fine, thank you", "es": "Estoy bien, gracias", "fr": "Je vais bien, merci", "de": "Mir geht es gut, danke", "ur": "میں ٹھیک ہوں، شکریہ"},
-            {"en": "See you later!", "es": "¡Hasta luego!", "fr": "À plus tard!", "de": "Bis später!", "ur": "بعد میں ملیں گے!"},
-            {"en": "Good morning!", "es": "¡Buenos días!", "fr": "Bonjour!", "de": "Guten Morgen!", "ur": "صبح بخیر!"},
-            {"en": "Have a great day!", "es": "¡Que tengas un buen día!", "fr": "Passez une excellente journée!", "de": "Hab einen schönen Tag!", "ur": "آپ کا دن اچھا گزرے!"},
-            {"en": "I love this movie", "es": "Me encanta esta película", "fr": "J'adore ce film", "de": "Ich liebe diesen Film", "ur": "مجھے یہ فلم پسند ہے"},
-            {"en": "What time is it?", "es": "¿Qué hora es?", "fr": "Quelle heure est-il?", "de": "Wie spät ist es?", "ur": "کیا وقت ہے؟"},
-            {"en": "I'm sorry", "es": "Lo siento", "fr": "Je suis désolé", "de": "Es tut mir leid", "ur": "میں معافی چاہتا ہوں"}
-        ]
+        return _get_encoder(_ENCODER_NAME, self._device, dtype, max_seq_length=self.max_seq_length)
+    
+    def _load_onnx_encoder(self, dtype: str) -> Optional[SentenceTransformer]:
+        """Load the encoder on ONNX Runtime, or return None to fall back to PyTorch"""
+        if importlib.util.find_spec('onnxruntime') is None or importlib.util.find_spec('optimum') is None:
+            logger.warning("onnxruntime/optimum not installed, using the PyTorch encoder")
+            return None
         
-        # Medical terminology - Enhanced with temperature, health conditions, and conversational medical phrases
-        medical_data = [
-            # Basic vital signs and measurements
-            {"en": "Blood pressure", "es": "Presión arterial", "fr": "Tension artérielle", "de": "Blutdruck", "ur": "بلڈ پریشر"},
-            {"en": "Heart rate", "es": "Frecuencia cardíaca", "fr": "Rythme cardiaque", "de": "Herzfrequenz", "ur": "دل کی رفتار"},
-            {"en": "Body temperature", "es": "Temperatura corporal", "fr": "Température corporelle", "de": "Körpertemperatur", "ur": "جسم کا درجہ حرارت"},
-            {"en": "Check your temperature", "es": "Revisa tu temperatura", "fr": "Vérifiez votre température", "de": "Überprüfen Sie Ihre Temperatur", "ur": "اپنا درجہ حرارت چیک کریں"},
-            
-            # Temperature and fever related (addressing "you are hot" context)
-            {"en": "You have a fever", "es": "Tienes fiebre", "fr": "Vous avez de la fièvre", "de": "Sie haben Fieber", "ur": "آپ کو بخار ہے"},
-            {"en": "Feeling hot and feverish", "es": "Sintiéndose caliente y febril", "fr": "Se sentir chaud et fiévreux", "de": "Heiß und fiebrig fühlen", "ur": "بخار اور گرمی محسوس کرنا"},
-            {"en": "You feel warm", "es": "Te sientes caliente", "fr": "Vous vous sentez chaud", "de": "Sie fühlen sich warm", "ur": "آپ گرم محسوس کر رہے ہیں"},
-            {"en": "Running a temperature", "es": "Teniendo temperatura alta", "fr": "Avoir de la température", "de": "Temperatur haben", "ur": "تیز بخار ہے"},
-            
-            # Mental health and mood (addressing "feeling blue" context)
-            {"en": "Feeling depressed", "es": "Sintiéndose deprimido", "fr": "Se sentir déprimé", "de": "Sich deprimiert fühlen", "ur": "ڈپریشن محسوس کرنا"},
-            {"en": "Mental health support", "es": "Apoyo de salud mental", "fr": "Soutien en santé mentale", "de": "Unterstützung für psychische Gesundheit", "ur": "ذہنی صحت کی مدد"},
-            {"en": "Feeling sad or blue", "es": "Sintiéndose triste", "fr": "Se sentir triste ou déprimé", "de": "Sich traurig oder niedergeschlagen fühlen", "ur": "اداس یا پریشان محسوس کرنا"},
-            {"en": "Mood disorders", "es": "Trastornos del estado de ánimo", "fr": "Troubles de l'humeur", "de": "Stimmungsstörungen", "ur": "موڈ کی خرابی"},
-            
-            # Medical instructions and care
-            {"en": "Take this medication twice daily", "es": "Tome este medicamento dos veces al día", "fr": "Prenez ce médicament deux fois par jour", "de": "Nehmen Sie dieses Medikament zweimal täglich", "ur": "یہ دوا روزانہ دو بار لیں"},
-            {"en": "You need to rest", "es": "Necesitas descansar", "fr": "Vous devez vous reposer", "de": "Du musst dich ausruhen", "ur": "آپ کو آرام کرنا چاہیے"},
-            {"en": "Stay hydrated", "es": "Manténgase hidratado", "fr": "Restez hydraté", "de": "Bleiben Sie hydratisiert", "ur": "پانی پیتے رہیں"},
-            {"en": "Get plenty of rest", "es": "Descanse mucho", "fr": "Reposez-vous beaucoup", "de": "Viel Ruhe bekommen", "ur": "خوب آرام کریں"},
-            
-            # Medical facilities and processes
-            {"en": "Emergency room", "es": "Sala de emergencias", "fr": "Salle d'urgence", "de": "Notaufnahme", "ur": "ایمرجنسی روم"},
-            {"en": "Medical history", "es": "Historia médica", "fr": "Antécédents médicaux", "de": "Krankengeschichte", "ur": "طبی تاریخ"},
-            {"en": "Prescription", "es": "Receta médica", "fr": "Ordonnance", "de": "Rezept", "ur": "نسخہ"},
-            {"en": "Symptoms", "es": "Síntomas", "fr": "Symptômes", "de": "Symptome", "ur": "علامات"},
-            {"en": "Diagnosis", "es": "Diagnóstico", "fr": "Diagnostic", "de": "Diagnose", "ur": "تشخیص"},
-            {"en": "Treatment", "es": "Tratamiento", "fr": "Traitement", "de": "Behandlung", "ur": "علاج"},
-            
-            # Health conditions and complaints
-            {"en": "Not feeling well", "es": "No me siento bien", "fr": "Je ne me sens pas bien", "de": "Fühle mich nicht wohl", "ur": "طبیعت ٹھیک نہیں"},
-            {"en": "Under the weather", "es": "Sintiéndose mal", "fr": "Pas dans son assiette", "de": "Nicht ganz fit", "ur": "طبیعت خراب ہے"},
-            {"en": "Health checkup", "es": "Chequeo médico", "fr": "Bilan de santé", "de": "Gesundheitscheck", "ur": "طبی معائنہ"}
-        ]
+        try:
+            model_dir, file_name = self._build_onnx_if_missing()
+            return _get_encoder(model_dir, self._device, dtype, 'onnx', file_name, self.max_seq_length)
+        except Exception as e:
+            logger.warning(f"Failed to load ONNX encoder, using the PyTorch encoder: {e}")
+            return None
+    
+    def _build_onnx_if_missing(self) -> Tuple[str, str]:
+        """Export a graph-optimized ONNX copy of the encoder once, next to the corpora"""
+        from sentence_transformers import export_optimized_onnx_model
         
-        # Business terminology
-        business_data = [
-            {"en": "Schedule a meeting", "es": "Programar una reunión", "fr": "Planifier une réunion", "de": "Ein Meeting planen", "ur": "میٹنگ کا وقت مقرر کریں"},
-            {"en": "Business proposal", "es": "Propuesta comercial", "fr": "Proposition commerciale", "de": "Geschäftsvorschlag", "ur": "کاروباری تجویز"},
-            {"en": "Revenue growth", "es": "Crecimiento de ingresos", "fr": "Croissance des revenus", "de": "Umsatzwachstum", "ur": "آمدنی میں اضافہ"},
-            {"en": "Market analysis", "es": "Análisis de mercado", "fr": "Analyse de marché", "de": "Marktanalyse", "ur": "مارکیٹ کا تجزیہ"},
-            {"en": "Customer service", "es": "Servicio al cliente", "fr": "Service client", "de": "Kundendienst", "ur": "کسٹمر سروس"},
-            {"en": "Financial report", "es": "Informe financiero", "fr": "Rapport financier", "de": "Finanzbericht", "ur": "مالی رپورٹ"},
-            {"en": "Project deadline", "es": "Fecha límite del proyecto", "fr": "Date limite du projet", "de": "Projekttermin", "ur": "پروجیکٹ کی آخری تاریخ"},
-            {"en": "Budget allocation", "es": "Asignación de presupuesto", "fr": "Allocation budgétaire", "de": "Budgetzuweisung", "ur": "بجٹ کی تقسیم"},
-            {"en": "Strategic planning", "es": "Planificación estratégica", "fr": "Planification stratégique", "de": "Strategische Planung", "ur": "اسٹریٹجک پلاننگ"},
-            {"en": "Quality assurance", "es": "Aseguramiento de calidad", "fr": "Assurance qualité", "de": "Qualitätssicherung", "ur": "معیار کی یقین دہانی"}
-        ]
+        # O4 adds fp16 on top of O3's fused kernels and only runs on GPU
+        level = 'O4' if self._device == 'cuda' else 'O3'
+        model_dir = os.path.join(self.corpus_dir, 'encoder_onnx')
+        file_name = f"onnx/model_{level}.onnx"
         
-        # Technical/Computing
-        technical_data = [
-            {"en": "Database connection", "es": "Conexión a base de datos", "fr": "Connexion à la base de données", "de": "Datenbankverbindung", "ur": "ڈیٹابیس کنکشن"},
-            {"en": "Software development", "es": "Desarrollo de software", "fr": "Développement logiciel", "de": "Softwareentwicklung", "ur": "سافٹ ویئر ڈیولپمنٹ"},
-            {"en": "Machine learning algorithm", "es": "Algoritmo de aprendizaje automático", "fr": "Algorithme d'apprentissage automatique", "de": "Algorithmus für maschinelles Lernen", "ur": "مشین لرننگ الگورتھم"},
-            {"en": "User interface", "es": "Interfaz de usuario", "fr": "Interface utilisateur", "de": "Benutzeroberfläche", "ur": "یوزر انٹرفیس"},
-            {"en": "System administrator", "es": "Administrador del sistema", "fr": "Administrateur système", "de": "Systemadministrator", "ur": "سسٹم ایڈمنسٹریٹر"},
-            {"en": "Cloud computing", "es": "Computación en la nube", "fr": "Informatique en nuage", "de": "Cloud-Computing", "ur": "کلاؤڈ کمپیوٹنگ"},
-            {"en": "Artificial intelligence", "es": "Inteligencia artificial", "fr": "Intelligence artificielle", "de": "Künstliche Intelligenz", "ur": "مصنوعی ذہانت"},
-            {"en": "Data security", "es": "Seguridad de datos", "fr": "Sécurité des données", "de": "Datensicherheit", "ur": "ڈیٹا سیکیورٹی"},
-            {"en": "Network protocol", "es": "Protocolo de red", "fr": "Protocole réseau", "de": "Netzwerkprotokoll", "ur": "نیٹ ورک پروٹوکول"},
-            {"en": "Version control", "es": "Control de versiones", "fr": "Contrôle de version", "de": "Versionskontrolle", "ur": "ورژن کنٹرول"}
-        ]
+        if not os.path.exists(os.path.join(model_dir, file_name)):
+            logger.info(f"Exporting {level}-optimized ONNX encoder to {model_dir}...")
+            model = SentenceTransformer(_ENCODER_NAME, device=self._device, backend='onnx')
+            model.save_pretrained(model_dir)
+            export_optimized_onnx_model(model, level, model_dir)
         
-        # News/Current events
-        news_data = [
-            {"en": "Breaking news", "es": "Noticias de última hora", "fr": "Dernières nouvelles", "de": "Eilmeldung", "ur": "تازہ خبریں"},
-            {"en": "Economic forecast", "es": "Pronóstico económico", "fr": "Prévisions économiques", "de": "Wirtschaftsprognose", "ur": "معاشی پیشن گوئی"},
-            {"en": "Climate change", "es": "Cambio climático", "fr": "Changement climatique", "de": "Klimawandel", "ur": "موسمیاتی تبدیلی"},
-            {"en": "Election results", "es": "Resultados electorales", "fr": "Résultats des élections", "de": "Wahlergebnisse", "ur": "انتخابی نتائج"},
-            {"en": "International relations", "es": "Relaciones internacionales", "fr": "Relations internationales", "de": "Internationale Beziehungen", "ur": "بین الاقوامی تعلقات"},
-            {"en": "Scientific research", "es": "Investigación científica", "fr": "Recherche scientifique", "de": "Wissenschaftliche Forschung", "ur": "سائنسی تحقیق"},
-            {"en": "Public health", "es": "Salud pública", "fr": "Santé publique", "de": "Öffentliche Gesundheit", "ur": "عوامی صحت"},
-            {"en": "Educational system", "es": "Sistema educativo", "fr": "Système éducatif", "de": "Bildungssystem", "ur": "تعلیمی نظام"},
-            {"en": "Environmental protection", "es": "Protección ambiental", "fr": "Protection de l'environnement", "de": "Umweltschutz", "ur": "ماحولیاتی تحفظ"},
-            {"en": "Technology advancement", "es": "Avance tecnológico", "fr": "Avancement technologique", "de": "Technologischer Fortschritt", "ur": "ٹیکنالوجی کی ترقی"}
-        ]
+        return model_dir, file_name
+    
+    def _encode_bulk(self, texts: List[str], cache_key: Optional[str] = None, batch_size: int = 128) -> np.ndarray:
+        """Encode texts in large batches, returning normalized float32 rows in input order.
         
-        # Legal & Formal
-        legal_data = [
-            {"en": "Terms and conditions", "es": "Términos y condiciones", "fr": "Conditions générales", "de": "Geschäftsbedingungen", "ur": "شرائط و ضوابط"},
-            {"en": "Legal agreement", "es": "Acuerdo legal", "fr": "Accord juridique", "de": "Rechtsvereinbarung", "ur": "قانونی معاہدہ"},
-            {"en": "Court hearing", "es": "Audiencia judicial", "fr": "Audience du tribunal", "de": "Gerichtsverhandlung", "ur": "عدالتی سماعت"},
-            {"en": "Power of attorney", "es": "Poder legal", "fr": "Procuration", "de": "Vollmacht", "ur": "وکالت نامہ"},
-            {"en": "Contract negotiation", "es": "Negociación de contrato", "fr": "Négociation de contrat", "de": "Vertragsverhandlung", "ur": "کنٹریکٹ کی بات چیت"},
-            {"en": "Intellectual property", "es": "Propiedad intelectual", "fr": "Propriété intellectuelle", "de": "Geistiges Eigentum", "ur": "دانشورانہ املاک"},
-            {"en": "Legal liability", "es": "Responsabilidad legal", "fr": "Responsabilité légale", "de": "Rechtliche Haftung", "ur": "قانونی ذمہ داری"},
-            {"en": "Due diligence", "es": "Diligencia debida", "fr": "Diligence raisonnable", "de": "Sorgfaltsprüfung", "ur": "محتاط جانچ"},
-            {"en": "Compliance requirements", "es": "Requisitos de cumplimiento", "fr": "Exigences de conformité", "de": "Compliance-Anforderungen", "ur": "تعمیل کی ضروریات"},
-            {"en": "Legal documentation", "es": "Documentación legal", "fr": "Documentation juridique", "de": "Rechtsdokumentation", "ur": "قانونی دستاویزات"}
-        ]
-
-        # Academic & Research
-        academic_data = [
-            {"en": "Research methodology", "es": "Metodología de investigación", "fr": "Méthodologie de recherche", "de": "Forschungsmethodik", "ur": "تحقیقی طریقہ کار"},
-            {"en": "Peer review", "es": "Revisión por pares", "fr": "Évaluation par les pairs", "de": "Peer-Review", "ur": "ہم مرتبہ جائزہ"},
-            {"en": "Literature review", "es": "Revisión de literatura", "fr": "Revue de littérature", "de": "Literaturübersicht", "ur": "ادبی جائزہ"},
-            {"en": "Statistical analysis", "es": "Análisis estadístico", "fr": "Analyse statistique", "de": "Statistische Analyse", "ur": "شماریاتی تجزیہ"},
-            {"en": "Academic conference", "es": "Conferencia académica", "fr": "Conférence académique", "de": "Akademische Konferenz", "ur": "علمی کانفرنس"},
-            {"en": "Dissertation defense", "es": "Defensa de tesis", "fr": "Soutenance de thèse", "de": "Dissertationsverteidigung", "ur": "مقالے کا دفاع"},
-            {"en": "Citation format", "es": "Formato de cita", "fr": "Format de citation", "de": "Zitierformat", "ur": "حوالہ جات کا انداز"},
-            {"en": "Hypothesis testing", "es": "Prueba de hipótesis", "fr": "Test d'hypothèse", "de": "Hypothesentest", "ur": "فرضیے کی جانچ"},
-            {"en": "Data collection", "es": "Recolección de datos", "fr": "Collecte de données", "de": "Datensammlung", "ur": "ڈیٹا اکٹھا کرنا"},
-            {"en": "Scholarly publication", "es": "Publicación académica", "fr": "Publication académique", "de": "Wissenschaftliche Publikation", "ur": "علمی اشاعت"}
-        ]
-
-        # Travel & Tourism
-        travel_data = [
-            {"en": "Hotel reservation", "es": "Reserva de hotel", "fr": "Réservation d'hôtel", "de": "Hotelreservierung", "ur": "ہوٹل کی بکنگ"},
-            {"en": "Flight booking", "es": "Reserva de vuelo", "fr": "Réservation de vol", "de": "Flugbuchung", "ur": "پرواز کی بکنگ"},
-            {"en": "Tourist attraction", "es": "Atracción turística", "fr": "Attraction touristique", "de": "Touristenattraktion", "ur": "سیاحتی مقام"},
-            {"en": "Local cuisine", "es": "Cocina local", "fr": "Cuisine locale", "de": "Lokale Küche", "ur": "مقامی کھانا"},
-            {"en": "Tour guide", "es": "Guía turístico", "fr": "Guide touristique", "de": "Reiseführer", "ur": "سیاحتی گائیڈ"},
-            {"en": "Currency exchange", "es": "Cambio de moneda", "fr": "Change de devises", "de": "Geldwechsel", "ur": "کرنسی تبدیلی"},
-            {"en": "Travel insurance", "es": "Seguro de viaje", "fr": "Assurance voyage", "de": "Reiseversicherung", "ur": "سفری انشورنس"},
-            {"en": "Public transportation", "es": "Transporte público", "fr": "Transport public", "de": "Öffentliche Verkehrsmittel", "ur": "عوامی ٹرانسپورٹ"},
-            {"en": "Cultural experience", "es": "Experiencia cultural", "fr": "Expérience culturelle", "de": "Kulturelle Erfahrung", "ur": "ثقافتی تجربہ"},
-            {"en": "Travel itinerary", "es": "Itinerario de viaje", "fr": "Itinéraire de voyage", "de": "Reiseroute", "ur": "سفری منصوبہ"}
-        ]
-
-        # Culinary & Food
-        culinary_data = [
-            {"en": "Menu selection", "es": "Selección del menú", "fr": "Sélection du menu", "de": "Menüauswahl", "ur": "مینو کا انتخاب"},
-            {"en": "Cooking technique", "es": "Técnica de cocina", "fr": "Technique de cuisine", "de": "Kochtechnik", "ur": "پکانے کی تکنیک"},
-            {"en": "Fresh ingredients", "es": "Ingredientes frescos", "fr": "Ingrédients frais", "de": "Frische Zutaten", "ur": "تازہ اجزاء"},
-            {"en": "Dietary restrictions", "es": "Restricciones dietéticas", "fr": "Restrictions alimentaires", "de": "Diätbeschränkungen", "ur": "غذائی پابندیاں"},
-            {"en": "Food allergy", "es": "Alergia alimentaria", "fr": "Allergie alimentaire", "de": "Nahrungsmittelallergie", "ur": "کھانے سے الرجی"},
-            {"en": "Recipe instructions", "es": "Instrucciones de receta", "fr": "Instructions de recette", "de": "Rezeptanweisungen", "ur": "ترکیب کی ہدایات"},
-            {"en": "Restaurant review", "es": "Reseña de restaurante", "fr": "Critique de restaurant", "de": "Restaurantbewertung", "ur": "ریستوران کا جائزہ"},
-            {"en": "Wine pairing", "es": "Maridaje de vinos", "fr": "Accord mets et vins", "de": "Weinpaarung", "ur": "شراب کا جوڑ"},
-            {"en": "Kitchen equipment", "es": "Equipo de cocina", "fr": "Équipement de cuisine", "de": "Küchenausstattung", "ur": "باورچی خانے کا سامان"},
-            {"en": "Food presentation", "es": "Presentación de comida", "fr": "Présentation culinaire", "de": "Speisenpräsentation", "ur": "کھانے کی پیشکش"}
-        ]
-
-        # Education & Learning
-        education_data = [
-            {"en": "Lesson plan", "es": "Plan de lección", "fr": "Plan de cours", "de": "Unterrichtsplan", "ur": "سبق کا منصوبہ"},
-            {"en": "Student assessment", "es": "Evaluación de estudiantes", "fr": "Évaluation des étudiants", "de": "Schülerbewertung", "ur": "طلباء کا جائزہ"},
-            {"en": "Learning objectives", "es": "Objetivos de aprendizaje", "fr": "Objectifs d'apprentissage", "de": "Lernziele", "ur": "سیکھنے کے مقاصد"},
-            {"en": "Educational resources", "es": "Recursos educativos", "fr": "Ressources éducatives", "de": "Bildungsressourcen", "ur": "تعلیمی وسائل"},
-            {"en": "Classroom management", "es": "Gestión del aula", "fr": "Gestion de classe", "de": "Klassenmanagement", "ur": "کلاس روم کا انتظام"},
-            {"en": "Academic achievement", "es": "Logro académico", "fr": "Réussite académique", "de": "Akademische Leistung", "ur": "تعلیمی کامیابی"},
-            {"en": "Distance learning", "es": "Aprendizaje a distancia", "fr": "Apprentissage à distance", "de": "Fernunterricht", "ur": "فاصلاتی تعلیم"},
-            {"en": "Educational technology", "es": "Tecnología educativa", "fr": "Technologie éducative", "de": "Bildungstechnologie", "ur": "تعلیمی ٹیکنالوجی"},
-            {"en": "Study schedule", "es": "Horario de estudio", "fr": "Horaire d'étude", "de": "Stundenplan", "ur": "مطالعے کا شیڈول"},
-            {"en": "Parent-teacher meeting", "es": "Reunión de padres y maestros", "fr": "Réunion parents-enseignants", "de": "Eltern-Lehrer-Gespräch", "ur": "والدین اور استاد کی ملاقات"}
-        ]
-
-        # Finance & Banking
-        finance_data = [
-            {"en": "Investment portfolio", "es": "Cartera de inversiones", "fr": "Portefeuille d'investissement", "de": "Investmentportfolio", "ur": "سرمایہ کاری کا پورٹ فولیو"},
-            {"en": "Credit score", "es": "Puntuación crediticia", "fr": "Score de crédit", "de": "Kreditwürdigkeit", "ur": "کریڈٹ سکور"},
-            {"en": "Mortgage application", "es": "Solicitud de hipoteca", "fr": "Demande d'hypothèque", "de": "Hypothekenantrag", "ur": "رہن کی درخواست"},
-            {"en": "Interest rate", "es": "Tasa de interés", "fr": "Taux d'intérêt", "de": "Zinssatz", "ur": "سود کی شرح"},
-            {"en": "Financial planning", "es": "Planificación financiera", "fr": "Planification financière", "de": "Finanzplanung", "ur": "مالی منصوبہ بندی"},
-            {"en": "Stock market", "es": "Mercado de valores", "fr": "Marché boursier", "de": "Aktienmarkt", "ur": "سٹاک مارکیٹ"},
-            {"en": "Retirement savings", "es": "Ahorros para la jubilación", "fr": "Épargne retraite", "de": "Altersvorsorge", "ur": "ریٹائرمنٹ کی بچت"},
-            {"en": "Banking fees", "es": "Tarifas bancarias", "fr": "Frais bancaires", "de": "Bankgebühren", "ur": "بینک کی فیسیں"},
-            {"en": "Currency trading", "es": "Comercio de divisas", "fr": "Trading de devises", "de": "Devisenhandel", "ur": "کرنسی ٹریڈنگ"},
-            {"en": "Risk management", "es": "Gestión de riesgos", "fr": "Gestion des risques", "de": "Risikomanagement", "ur": "خطرات کا انتظام"}
-        ]
-
-        # Sports & Fitness
-        sports_data = [
-            {"en": "Training program", "es": "Programa de entrenamiento", "fr": "Programme d'entraînement", "de": "Trainingsprogramm", "ur": "تربیتی پروگرام"},
-            {"en": "Athletic performance", "es": "Rendimiento atlético", "fr": "Performance athlétique", "de": "Sportliche Leistung", "ur": "کھیلوں کی کارکردگی"},
-            {"en": "Killer performance", "es": "Rendimiento increíble", "fr": "Performance fantastique", "de": "Fantastische Leistung", "ur": "شاندار کارکردگی"},
-            {"en": "Absolutely killed it", "es": "Lo hizo increíblemente bien", "fr": "C'était fantastique", "de": "Hat es fantastisch gemacht", "ur": "شاندار کارکردگی کی"},
-            {"en": "Crushing the game", "es": "Dominando el juego", "fr": "Dominant le jeu", "de": "Das Spiel beherrschen", "ur": "کھیل میں غالب"},
-            {"en": "Smashing records", "es": "Rompiendo récords", "fr": "Battre des records", "de": "Rekorde brechen", "ur": "ریکارڈ توڑنا"},
-            {"en": "Beast mode activated", "es": "Modo bestia activado", "fr": "Mode bête activé", "de": "Biest-Modus aktiviert", "ur": "شیر کی طرح کھیل"},
-            {"en": "On fire today", "es": "En llamas hoy", "fr": "En feu aujourd'hui", "de": "Heute on fire", "ur": "آج زبردست فارم میں"},
-            {"en": "Absolutely crushing it", "es": "Absolutamente aplastándolo", "fr": "Absolument écrasant", "de": "Absolut zermalmen", "ur": "مکمل طور پر دبدبہ"},
-            {"en": "Dominating the field", "es": "Dominando el campo", "fr": "Dominant le terrain", "de": "Das Feld beherrschen", "ur": "میدان میں غالب"},
-            {"en": "That was insane", "es": "Eso fue increíble", "fr": "C'était dingue", "de": "Das war wahnsinnig", "ur": "یہ تو کمال تھا"},
-            {"en": "Totally nailed it", "es": "Lo clavó totalmente", "fr": "Totalement réussi", "de": "Voll getroffen", "ur": "مکمل طور پر کامیاب"},
-            {"en": "Playing out of their mind", "es": "Jugando increíblemente", "fr": "Joue de façon incroyable", "de": "Unglaublich spielen", "ur": "شاندار کھیل رہا ہے"},
-            {"en": "Fitness goal", "es": "Objetivo de fitness", "fr": "Objectif de remise en forme", "de": "Fitnessziel", "ur": "فٹنس کا ہدف"},
-            {"en": "Sports equipment", "es": "Equipo deportivo", "fr": "Équipement sportif", "de": "Sportausrüstung", "ur": "کھیل کا سامان"},
-            {"en": "Team strategy", "es": "Estrategia de equipo", "fr": "Stratégie d'équipe", "de": "Teamstrategie", "ur": "ٹیم کی حکمت عملی"},
-            {"en": "Championship tournament", "es": "Torneo de campeonato", "fr": "Tournoi de championnat", "de": "Meisterschaftsturnier", "ur": "چیمپئن شپ ٹورنامنٹ"},
-            {"en": "Injury prevention", "es": "Prevención de lesiones", "fr": "Prévention des blessures", "de": "Verletzungsprävention", "ur": "چوٹ سے بچاؤ"},
-            {"en": "Nutrition plan", "es": "Plan de nutrición", "fr": "Plan nutritionnel", "de": "Ernährungsplan", "ur": "غذائی منصوبہ"},
-            {"en": "Exercise routine", "es": "Rutina de ejercicios", "fr": "Routine d'exercices", "de": "Trainingsroutine", "ur": "ورزش کا طریقہ"},
-            {"en": "Physical therapy", "es": "Fisioterapia", "fr": "Kinésithérapie", "de": "Physiotherapie", "ur": "فزیو تھراپی"}
-        ]
-
-        # Additional categories data (continuing with remaining categories)
-        automotive_data = [
-            {"en": "Engine maintenance", "es": "Mantenimiento del motor", "fr": "Entretien moteur", "de": "Motorwartung", "ur": "انجن کی دیکھ بھال"},
-            {"en": "Brake system", "es": "Sistema de frenos", "fr": "Système de freinage", "de": "Bremssystem", "ur": "بریک سسٹم"},
-            {"en": "Vehicle inspection", "es": "Inspección del vehículo", "fr": "Inspection du véhicule", "de": "Fahrzeuginspektion", "ur": "گاڑی کا معائنہ"},
-            {"en": "Car insurance", "es": "Seguro de automóvil", "fr": "Assurance automobile", "de": "Autoversicherung", "ur": "کار انشورنس"},
-            {"en": "Fuel efficiency", "es": "Eficiencia de combustible", "fr": "Efficacité énergétique", "de": "Kraftstoffeffizienz", "ur": "ایندھن کی بچت"}
-        ]
-
-        real_estate_data = [
-            {"en": "Property valuation", "es": "Valuación de propiedad", "fr": "Évaluation immobilière", "de": "Immobilienbewertung", "ur": "جائیداد کی قیمت"},
-            {"en": "Rental agreement", "es": "Acuerdo de alquiler", "fr": "Contrat de location", "de": "Mietvertrag", "ur": "کرایے کا معاہدہ"},
-            {"en": "Home inspection", "es": "Inspección de vivienda", "fr": "Inspection domiciliaire", "de": "Hausinspektion", "ur": "گھر کا معائنہ"},
-            {"en": "Mortgage calculator", "es": "Calculadora de hipoteca", "fr": "Calculateur d'hypothèque", "de": "Hypothekenrechner", "ur": "گروی کیلکولیٹر"},
-            {"en": "Property management", "es": "Gestión de propiedades", "fr": "Gestion immobilière", "de": "Immobilienverwaltung", "ur": "جائیداد کا انتظام"}
-        ]
-
-        arts_culture_data = [
-            {"en": "Art exhibition", "es": "Exposición de arte", "fr": "Exposition d'art", "de": "Kunstausstellung", "ur": "آرٹ کی نمائش"},
-            {"en": "Musical performance", "es": "Actuación musical", "fr": "Performance musicale", "de": "Musikaufführung", "ur": "موسیقی کی پرفارمنس"},
-            {"en": "Cultural heritage", "es": "Patrimonio cultural", "fr": "Patrimoine culturel", "de": "Kulturerbe", "ur": "ثقافتی ورثہ"},
-            {"en": "Theater production", "es": "Producción teatral", "fr": "Production théâtrale", "de": "Theaterproduktion", "ur": "تھیٹر پروڈکشن"},
-            {"en": "Creative writing", "es": "Escritura creativa", "fr": "Écriture créative", "de": "Kreatives Schreiben", "ur": "تخلیقی تحریر"},
-            {"en": "Dance choreography", "es": "Coreografía de danza", "fr": "Chorégraphie de danse", "de": "Tanzchoreografie", "ur": "ڈانس کوریوگرافی"},
-            {"en": "Film production", "es": "Producción cinematográfica", "fr": "Production cinématographique", "de": "Filmproduktion", "ur": "فلم پروڈکشن"},
-            {"en": "Literary criticism", "es": "Crítica literaria", "fr": "Critique littéraire", "de": "Literaturkritik", "ur": "ادبی تنقید"},
-            {"en": "Museum collection", "es": "Colección de museo", "fr": "Collection de musée", "de": "Museumssammlung", "ur": "عجائب گھر کا مجموعہ"},
-            {"en": "Artistic technique", "es": "Técnica artística", "fr": "Technique artistique", "de": "Künstlerische Technik", "ur": "فنکارانہ تکنیک"}
-        ]
-
-        # Government & Politics
-        government_data = [
-            {"en": "Public policy", "es": "Política pública", "fr": "Politique publique", "de": "Öffentliche Politik", "ur": "عوامی پالیسی"},
-            {"en": "Legislative process", "es": "Proceso legislativo", "fr": "Processus législatif", "de": "Gesetzgebungsverfahren", "ur": "قانون سازی کا عمل"},
-            {"en": "Voter registration", "es": "Registro de votantes", "fr": "Inscription des électeurs", "de": "Wählerregistrierung", "ur": "ووٹر رجسٹریشن"},
-            {"en": "Government services", "es": "Servicios gubernamentales", "fr": "Services gouvernementaux", "de": "Regierungsdienstleistungen", "ur": "سرکاری خدمات"},
-            {"en": "Political campaign", "es": "Campaña política", "fr": "Campagne politique", "de": "Politischer Wahlkampf", "ur": "سیاسی مہم"},
-            {"en": "Civic duty", "es": "Deber cívico", "fr": "Devoir civique", "de": "Bürgerpflicht", "ur": "شہری فریضہ"},
-            {"en": "Electoral system", "es": "Sistema electoral", "fr": "Système électoral", "de": "Wahlsystem", "ur": "انتخابی نظام"},
-            {"en": "Constitutional rights", "es": "Derechos constitucionales", "fr": "Droits constitutionnels", "de": "Verfassungsrechte", "ur": "آئینی حقوق"},
-            {"en": "Public administration", "es": "Administración pública", "fr": "Administration publique", "de": "Öffentliche Verwaltung", "ur": "عوامی انتظامیہ"},
-            {"en": "Democratic process", "es": "Proceso democrático", "fr": "Processus démocratique", "de": "Demokratischer Prozess", "ur": "جمہوری عمل"}
-        ]
-
-        # Social Media - Enhanced with conversational and colloquial expressions
-        social_media_data = [
-            # Compliments and appearance
-            {"en": "You look amazing", "es": "Te ves increíble", "fr": "Tu es magnifique", "de": "Du siehst fantastisch aus", "ur": "آپ بہت خوبصورت لگ رہے ہیں"},
-            {"en": "You are so hot", "es": "Estás muy guapo/a", "fr": "Tu es très sexy", "de": "Du bist so heiß", "ur": "آپ بہت خوبصورت ہیں"},
-            {"en": "Looking good today", "es": "Te ves bien hoy", "fr": "Tu es beau aujourd'hui", "de": "Du siehst heute gut aus", "ur": "آج آپ اچھے لگ رہے ہیں"},
-            {"en": "Stunning outfit", "es": "Atuendo impresionante", "fr": "Tenue magnifique", "de": "Atemberaubendes Outfit", "ur": "شاندار لباس"},
-            
-            # Emotions and feelings (casual)
-            {"en": "I'm feeling blue", "es": "Me siento triste", "fr": "Je me sens triste", "de": "Mir ist traurig", "ur": "میں اداس محسوس کر رہا ہوں"},
-            {"en": "Feeling down today", "es": "Me siento mal hoy", "fr": "Je me sens déprimé aujourd'hui", "de": "Heute fühle ich mich schlecht", "ur": "آج پریشان ہوں"},
-            {"en": "On cloud nine", "es": "En las nubes", "fr": "Aux anges", "de": "Im siebten Himmel", "ur": "بہت خوش ہوں"},
-            {"en": "Living my best life", "es": "Viviendo mi mejor vida", "fr": "Je vis ma meilleure vie", "de": "Ich lebe mein bestes Leben", "ur": "اپنی بہترین زندگی گزار رہا ہوں"},
-            
-            # Performance and achievements (casual)
-            {"en": "That was fire", "es": "Eso estuvo genial", "fr": "C'était génial", "de": "Das war der Hammer", "ur": "یہ شاندار تھا"},
-            {"en": "Absolutely killed it", "es": "Lo mataste", "fr": "Tu as assuré", "de": "Du hast es gerockt", "ur": "بہترین کارکردگی"},
-            {"en": "Nailed the performance", "es": "Clavaste la actuación", "fr": "Tu as réussi ta performance", "de": "Die Leistung war perfekt", "ur": "کامیاب پرفارمنس"},
-            {"en": "Epic win", "es": "Victoria épica", "fr": "Victoire épique", "de": "Epischer Sieg", "ur": "شاندار کامیابی"},
-            
-            # Technology and digital life
-            {"en": "Phone died on me", "es": "Se me murió el teléfono", "fr": "Mon téléphone est mort", "de": "Mein Handy ist kaputt", "ur": "فون کی بیٹری ختم ہو گئی"},
-            {"en": "Need to charge up", "es": "Necesito cargar", "fr": "Je dois recharger", "de": "Muss aufladen", "ur": "چارج کرنا ہے"},
-            {"en": "Going viral", "es": "Se está volviendo viral", "fr": "Ça devient viral", "de": "Wird viral", "ur": "وائرل ہو رہا ہے"},
-            {"en": "Posted a story", "es": "Publiqué una historia", "fr": "J'ai posté une story", "de": "Story gepostet", "ur": "اسٹوری پوسٹ کی"},
-            
-            # Social interactions
-            {"en": "Slide into DMs", "es": "Escribir al privado", "fr": "Envoyer un message privé", "de": "Private Nachricht senden", "ur": "پرائیویٹ میسج بھیجنا"},
-            {"en": "Double tap this", "es": "Dale doble tap", "fr": "Double-cliquez", "de": "Doppelt antippen", "ur": "ڈبل ٹیپ کریں"},
-            {"en": "Drop a comment", "es": "Deja un comentario", "fr": "Laisse un commentaire", "de": "Kommentier das", "ur": "کمنٹ کریں"},
-            {"en": "Tag your squad", "es": "Etiqueta a tu grupo", "fr": "Tague tes potes", "de": "Markiere deine Crew", "ur": "اپنے دوستوں کو ٹیگ کریں"},
+        With a cache_key the tokenizer output is persisted, so rebuilding the same
+        texts later only runs the transformer forward pass.
+        """
+        # Encode each distinct text once, shortest first to keep batch padding low
+        unique_texts = list(dict.fromkeys(texts))
+        lengths = np.fromiter((len(text.split()) for text in unique_texts), dtype=np.int64, count=len(unique_texts))
+        order = np.argsort(lengths, kind='stable')
+        sorted_texts = [unique_texts[i] for i in order]
+        
+        # Each batch is written straight into its rows of one preallocated float32
+        # matrix (upcasting fp16 output), instead of stacking per-batch arrays
+        shape = (len(unique_texts), self.vector_dim)
+        if cache_key is not None and len(unique_texts) >= _COMPRESSED_MIN_VECTORS:
+            # Corpus builds this large write into an unlinked disk-backed buffer, so
+            # the matrix can be paged out instead of pinning RAM while FAISS reads it
+            embeddings = np.memmap(tempfile.TemporaryFile(dir=self.corpus_dir), dtype=np.float32, mode='w+', shape=shape)
+        else:
+            embeddings = np.empty(shape, dtype=np.float32)
+        with torch.inference_mode():
+            if cache_key is None:
+                for start in range(0, len(sorted_texts), batch_size):
+                    embeddings[order[start:start + batch_size]] = self.embedding_model.encode(
+                        sorted_texts[start:start + batch_size],
+                        batch_size=batch_size,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True,
+                        show_progress_bar=False
+                    )
+            else:
+                embeddings[order] = self._encode_features(self._tokenize_cached(sorted_texts, cache_key), batch_size)
+        
+        # Already one row per input when the texts were distinct
+        if len(unique_texts) == len(texts):
+            return embeddings
+        row_of = {text: i for i, text in enumerate(unique_texts)}
+        return self._take_rows(embeddings, np.fromiter((row_of[text] for text in texts), dtype=np.int64, count=len(texts)))
+    
+    def _take_rows(self, matrix: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """matrix[rows], staying disk-backed when matrix is a memmap from _encode_bulk"""
+        if not isinstance(matrix, np.memmap) or len(rows) == 0:
+            return matrix[rows]
+        
+        # A run of consecutive rows is just a view of the memmap
+        if rows[-1] - rows[0] + 1 == len(rows) and np.all(np.diff(rows) == 1):
+            return matrix[rows[0]:rows[-1] + 1]
+        
+        # Otherwise gather in chunks into a second memmap, so the copy never sits in RAM
+        out = np.memmap(tempfile.TemporaryFile(dir=self.corpus_dir), dtype=matrix.dtype, mode='w+',
+                        shape=(len(rows),) + matrix.shape[1:])
+        for start in range(0, len(rows), _GATHER_CHUNK_ROWS):
+            out[start:start + _GATHER_CHUNK_ROWS] = matrix[rows[start:start + _GATHER_CHUNK_ROWS]]
+        return out
+    
+    def encode_queries(self, queries: List[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode search queries, reusing the embeddings of recently seen queries.
+        
+        Rows are written into out (shape (len(queries), vector_dim), float32) when given.
+        """
+        unique_queries = dict.fromkeys(queries)
+        # Take the hits under the lock; another thread may evict them right after
+        with self._query_cache_lock:
+            cached = {query: self._query_cache[query] for query in unique_queries if query in self._query_cache}
+            for query in cached:
+                self._query_cache.move_to_end(query)
+        
+        missing = [query for query in unique_queries if query not in cached]
+        fresh = {}
+        if missing and self._query_store is not None:
+            keys = {query: self._query_key(query) for query in missing}
+            with _QUERY_STORE_LOCK:
+                fresh = {query: self._query_store[key] for query, key in keys.items() if key in self._query_store}
+            missing = [query for query in missing if query not in fresh]
+        
+        # The encoder is only loaded when some query is in neither cache
+        if missing:
+            encoded = dict(zip(missing, self._encode_bulk(missing)))
+            fresh.update(encoded)
+            if self._query_store is not None:
+                _add_to_query_store({keys[query]: embedding for query, embedding in encoded.items()})
+        
+        embeddings = out if out is not None else np.empty((len(queries), self.vector_dim), dtype=np.float32)
+        for i, query in enumerate(queries):
+            embeddings[i] = cached[query] if query in cached else fresh[query]
+        
+        if fresh:
+            with self._query_cache_lock:
+                self._query_cache.update(fresh)
+                while len(self._query_cache) > _QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        return embeddings
+    
+    def _query_key(self, query: str) -> str:
+        """Persistent store key of a query: hash of the encoder settings and the text"""
+        return hashlib.sha256(f"{_ENCODER_NAME}\0{self.max_seq_length}\0{query}".encode('utf-8')).hexdigest()
+    
+    def _query_buffer(self, n: int) -> np.ndarray:
+        """Per-thread scratch rows for query embeddings, grown as needed and reused across searches"""
+        buffer = getattr(self._query_buffers, 'array', None)
+        if buffer is None or len(buffer) < n:
+            buffer = np.empty((max(n, 1), self.vector_dim), dtype=np.float32)
+            self._query_buffers.array = buffer
+        return buffer[:n]
+    
+    def _tokenize_cached(self, texts: List[str], cache_key: str) -> Dict[str, torch.Tensor]:
+        """Tokenize texts once and reuse the tensors while the texts are unchanged"""
+        path = os.path.join(self.corpus_dir, f"{cache_key}.tok.pt")
+        # A digest of the texts is stored instead of the texts themselves
+        digest = hashlib.sha256()
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        texts_hash = digest.hexdigest()
+        
+        if os.path.exists(path):
+            cached = torch.load(path)
+            if cached.get('texts_hash') == texts_hash and cached.get('max_seq_length') == self.embedding_model.max_seq_length:
+                return cached['features']
+        
+        features = dict(self.embedding_model.tokenize(texts))
+        torch.save({'texts_hash': texts_hash, 'max_seq_length': self.embedding_model.max_seq_length, 'features': features}, path)
+        return features
+    
+    def _encode_features(self, features: Dict[str, torch.Tensor], batch_size: int = 128) -> np.ndarray:
+        """Run pre-tokenized inputs through the encoder, returning normalized float32 rows"""
+        n = len(features['input_ids'])
+        embeddings = np.empty((n, self.vector_dim), dtype=np.float32)
+        
+        for start in range(0, n, batch_size):
+            batch = {name: tensor[start:start + batch_size] for name, tensor in features.items()}
             
-            # Slang and expressions
-            {"en": "No cap", "es": "Sin mentir", "fr": "Sans mentir", "de": "Echt jetzt", "ur": "سچ میں"},
-            {"en": "It's giving vibes", "es": "Da buenas vibras", "fr": "Ça donne des bonnes vibes", "de": "Hat gute Vibes", "ur": "اچھا لگ رہا ہے"},
-            {"en": "Periodt", "es": "Punto final", "fr": "Point final", "de": "Punkt aus", "ur": "بس اتنا ہی"},
-            {"en": "Slay queen", "es": "Reina poderosa", "fr": "Reine puissante", "de": "Starke Königin", "ur": "شاندار ملکہ"},
+            # Inputs are length-sorted, so trim padding to the longest row of this batch
+            width = int(batch['attention_mask'].sum(dim=1).max())
+            batch = {name: tensor[:, :width].to(self.embedding_model.device) for name, tensor in batch.items()}
             
-            # Events and activities
-            {"en": "The party was dead", "es": "La fiesta estuvo aburrida", "fr": "La fête était morte", "de": "Die Party war tot", "ur": "پارٹی بورنگ تھی"},
-            {"en": "Had a blast", "es": "Me divertí mucho", "fr": "Je me suis éclaté", "de": "Hatte einen Riesenspaß", "ur": "بہت مزہ آیا"},
-            {"en": "FOMO is real", "es": "El miedo a perdérselo es real", "fr": "La peur de rater quelque chose", "de": "Angst etwas zu verpassen", "ur": "کچھ چھوٹ جانے کا ڈر"},
-            {"en": "Living for this", "es": "Vivo para esto", "fr": "Je vis pour ça", "de": "Dafür lebe ich", "ur": "یہی میری زندگی ہے"}
-        ]
-
-        # Environmental Science
-        environmental_data = [
-            {"en": "Carbon footprint", "es": "Huella de carbono", "fr": "Empreinte carbone", "de": "CO2-Fußabdruck", "ur": "کاربن فوٹ پرنٹ"},
-            {"en": "Renewable energy", "es": "Energía renovable", "fr": "Énergie renouvelable", "de": "Erneuerbare Energie", "ur": "قابل تجدید توانائی"},
-            {"en": "Ecosystem preservation", "es": "Preservación del ecosistema", "fr": "Préservation de l'écosystème", "de": "Ökosystemerhaltung", "ur": "ماحولیاتی نظام کا تحفظ"},
-            {"en": "Sustainable development", "es": "Desarrollo sostenible", "fr": "Développement durable", "de": "Nachhaltige Entwicklung", "ur": "پائیدار ترقی"},
-            {"en": "Climate adaptation", "es": "Adaptación climática", "fr": "Adaptation climatique", "de": "Klimaanpassung", "ur": "آب و ہوا کے ساتھ ہم آہنگی"},
-            {"en": "Biodiversity conservation", "es": "Conservación de la biodiversidad", "fr": "Conservation de la biodiversité", "de": "Biodiversitätsschutz", "ur": "حیاتیاتی تنوع کا تحفظ"},
-            {"en": "Pollution control", "es": "Control de la contaminación", "fr": "Contrôle de la pollution", "de": "Umweltverschmutzungskontrolle", "ur": "آلودگی کنٹرول"},
-            {"en": "Waste management", "es": "Gestión de residuos", "fr": "Gestion des déchets", "de": "Abfallwirtschaft", "ur": "فضلہ کا انتظام"},
-            {"en": "Environmental impact", "es": "Impacto ambiental", "fr": "Impact environnemental", "de": "Umweltauswirkung", "ur": "ماحولیاتی اثرات"},
-            {"en": "Green technology", "es": "Tecnología verde", "fr": "Technologie verte", "de": "Grüne Technologie", "ur": "سبز ٹیکنالوجی"}
-        ]
-
-        # Religious & Spiritual
-        religious_data = [
-            {"en": "Spiritual guidance", "es": "Orientación espiritual", "fr": "Guidance spirituelle", "de": "Spirituelle Führung", "ur": "روحانی رہنمائی"},
-            {"en": "Religious ceremony", "es": "Ceremonia religiosa", "fr": "Cérémonie religieuse", "de": "Religiöse Zeremonie", "ur": "مذہبی تقریب"},
-            {"en": "Faith community", "es": "Comunidad de fe", "fr": "Communauté de foi", "de": "Glaubensgemeinschaft", "ur": "ایمانی برادری"},
-            {"en": "Sacred text", "es": "Texto sagrado", "fr": "Texte sacré", "de": "Heiliger Text", "ur": "مقدس کتاب"},
-            {"en": "Prayer service", "es": "Servicio de oración", "fr": "Service de prière", "de": "Gebetsgottesdienst", "ur": "نماز کی خدمت"},
-            {"en": "Meditation practice", "es": "Práctica de meditación", "fr": "Pratique de méditation", "de": "Meditationspraxis", "ur": "مراقبے کی مشق"},
-            {"en": "Religious holiday", "es": "Festividad religiosa", "fr": "Fête religieuse", "de": "Religiöser Feiertag", "ur": "مذہبی تہوار"},
-            {"en": "Moral teaching", "es": "Enseñanza moral", "fr": "Enseignement moral", "de": "Moralische Lehre", "ur": "اخلاقی تعلیم"},
-            {"en": "Spiritual journey", "es": "Viaje espiritual", "fr": "Voyage spirituel", "de": "Spirituelle Reise", "ur": "روحانی سفر"},
-            {"en": "Divine blessing", "es": "Bendición divina", "fr": "Bénédiction divine", "de": "Göttlicher Segen", "ur": "الہی برکت"}
-        ]
-
-        # Pharmaceutical
-        pharmaceutical_data = [
-            {"en": "Drug interaction", "es": "Interacción de medicamentos", "fr": "Interaction médicamenteuse", "de": "Arzneimittelwechselwirkung", "ur": "دوا کا باہمی اثر"},
-            {"en": "Clinical trial", "es": "Ensayo clínico", "fr": "Essai clinique", "de": "Klinische Studie", "ur": "کلینیکل ٹرائل"},
-            {"en": "Prescription label", "es": "Etiqueta de prescripción", "fr": "Étiquette d'ordonnance", "de": "Verschreibungsetikett", "ur": "نسخے کا لیبل"},
-            {"en": "Generic medication", "es": "Medicamento genérico", "fr": "Médicament générique", "de": "Generikum", "ur": "عام دوا"},
-            {"en": "Side effects", "es": "Efectos secundarios", "fr": "Effets secondaires", "de": "Nebenwirkungen", "ur": "ضمنی اثرات"},
-            {"en": "Dosage instructions", "es": "Instrucciones de dosificación", "fr": "Instructions de dosage", "de": "Dosierungsanweisungen", "ur": "خوراک کی ہدایات"},
-            {"en": "Pharmacy consultation", "es": "Consulta farmacéutica", "fr": "Consultation pharmaceutique", "de": "Apothekenberatung", "ur": "فارمیسی مشاورت"},
-            {"en": "Drug safety", "es": "Seguridad del medicamento", "fr": "Sécurité du médicament", "de": "Arzneimittelsicherheit", "ur": "دوا کی حفاظت"},
-            {"en": "Medication management", "es": "Gestión de medicamentos", "fr": "Gestion des médicaments", "de": "Medikamentenmanagement", "ur": "دوا کا انتظام"},
-            {"en": "Pharmaceutical research", "es": "Investigación farmacéutica", "fr": "Recherche pharmaceutique", "de": "Pharmazeutische Forschung", "ur": "دوائی تحقیق"}
-        ]
-
-        # Save corpora
-        corpus_data = {
-            'opus_opensubtitles': opensubtitles_data,
-            'medical_terminology': medical_data,
-            'business_common': business_data,
-            'technical_computing': technical_data,
-            'news_current': news_data,
-            'legal_formal': legal_data,
-            'academic_research': academic_data,
-            'travel_tourism': travel_data,
-            'culinary_food': culinary_data,
-            'education_learning': education_data,
-            'finance_banking': finance_data,
-            'sports_fitness': sports_data,
-            'automotive_transport': automotive_data,
-            'real_estate': real_estate_data,
-            'arts_culture': arts_culture_data,
-            'government_politics': government_data,
-            'social_media': social_media_data,
-            'environmental_science': environmental_data,
-            'religious_spiritual': religious_data,
-            'pharmaceutical': pharmaceutical_data
-        }
+            output = self.embedding_model(batch)['sentence_embedding']
+            output = torch.nn.functional.normalize(output.float(), p=2, dim=1)
+            embeddings[start:start + len(output)] = output.cpu().numpy()
+        
+        return embeddings
+    
+    def create_sample_corpora(self):
+        """Create sample corpus data for demonstration"""
+        # Nothing to do once every corpus has been written
+        if all(os.path.exists(os.path.join(self.corpus_dir, f"{name}.json")) for name in self.corpus_sources):
+            return
+        
+        logger.info("Creating sample corpora...")
+        
+        corpus_data = _read_json(_SAMPLE_CORPORA_PATH)
         
         for corpus_name, data in corpus_data.items():
             self.save_corpus(corpus_name, data)
             logger.info(f"Created {corpus_name} corpus with {len(data)} entries")
     
     def save_corpus(self, corpus_name: str, data: List[Dict]):
-        """Save corpus data to file"""
+        """Save corpus data to file, plus a small stats sidecar with the entry count and file mtime"""
         filepath = os.path.join(self.corpus_dir, f"{corpus_name}.json")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump({
-                'name': corpus_name,
-                'data': data,
-                'created_at': datetime.now().isoformat(),
-                'count': len(data)
-            }, f, ensure_ascii=False, indent=2)
+        created_at = datetime.now().isoformat()
+        _write_json(filepath, {
+            'name': corpus_name,
+            'data': data,
+            'created_at': created_at,
+            'count': len(data)
+        })
+        stat = os.stat(filepath)
+        self._write_stats(corpus_name, stat.st_mtime_ns, len(data), created_at)
+        
+        self._corpus_cache[corpus_name] = (stat.st_mtime, data)
     
     def load_corpus(self, corpus_name: str) -> List[Dict]:
-        """Load corpus data from file"""
+        """Load corpus data from file, reusing the parsed data while the file is unchanged"""
         filepath = os.path.join(self.corpus_dir, f"{corpus_name}.json")
-        if not os.path.exists(filepath):
+        try:
+            mtime = os.stat(filepath).st_mtime
+        except FileNotFoundError:
+            self._corpus_cache.pop(corpus_name, None)
             return []
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            corpus_info = json.load(f)
-            return corpus_info.get('data', [])
+        cached = self._corpus_cache.get(corpus_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        # Intern language codes and texts: both repeat across rows and corpora, and
+        # the parsed data stays resident in the cache and in self.corpora
+        data = [
+            {sys.intern(lang): sys.intern(text) if isinstance(text, str) else text for lang, text in entry.items()}
+            for entry in _read_json(filepath).get('data', [])
+        ]
+        self._corpus_cache[corpus_name] = (mtime, data)
+        return data
     
-    def build_vector_index(self, corpus_name: str, source_lang: str = 'en'):
-        """Build FAISS vector index for a corpus"""
-        logger.info(f"Building vector index for {corpus_name}...")
+    def _stats_path(self, corpus_name: str) -> str:
+        """Path of the sidecar holding a corpus' entry count"""
+        return os.path.join(self.corpus_dir, f"{corpus_name}_stats.json")
+    
+    def _write_stats(self, corpus_name: str, mtime_ns: int, count: int, created_at: Optional[str] = None):
+        """Write the stats sidecar for the corpus file last modified at mtime_ns"""
+        _write_json(self._stats_path(corpus_name), {
+            'name': corpus_name,
+            'created_at': created_at or datetime.now().isoformat(),
+            'count': count,
+            'mtime_ns': mtime_ns
+        })
+    
+    def corpus_size(self, corpus_name: str) -> int:
+        """Number of entries in a corpus, read from its stats sidecar while that matches the file"""
+        filepath = os.path.join(self.corpus_dir, f"{corpus_name}.json")
+        try:
+            mtime_ns = os.stat(filepath).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        
+        try:
+            stats = _read_json(self._stats_path(corpus_name))
+            if stats.get('mtime_ns') == mtime_ns:
+                return stats['count']
+        except (FileNotFoundError, KeyError, ValueError):
+            pass
         
+        # No sidecar, or the corpus file was written by something other than save_corpus
+        count = len(self.load_corpus(corpus_name))
+        self._write_stats(corpus_name, mtime_ns, count)
+        return count
+    
+    def load_corpus_columns(self, corpus_name: str) -> Dict[str, np.ndarray]:
+        """Load a corpus as parallel per-language columns (None where a row lacks that language)"""
         data = self.load_corpus(corpus_name)
-        if not data:
-            logger.warning(f"No data found for corpus {corpus_name}")
+        languages = dict.fromkeys(lang for entry in data for lang in entry)
+        
+        # Texts are already interned by load_corpus, so the columns share their strings
+        columns = {}
+        for lang in languages:
+            columns[lang] = np.array([entry.get(lang) for entry in data], dtype=object)
+        if columns:
+            self.corpora[corpus_name] = columns
+        return columns
+    
+    def row(self, corpus_name: str, i: int) -> Dict[str, str]:
+        """Dict-style view of one row of a column-loaded corpus"""
+        return {lang: column[i] for lang, column in self.corpora[corpus_name].items() if column[i] is not None}
+    
+    def _make_index(self, n_expected: int) -> faiss.Index:
+        """Create an empty inner-product index sized for n_expected normalized vectors"""
+        if n_expected < _HNSW_MIN_VECTORS:
+            # Exhaustive search over fp16 codes: half the bytes of IndexFlatIP on disk and per scan
+            return faiss.IndexScalarQuantizer(self.vector_dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        
+        if self.use_compressed_index and n_expected >= _COMPRESSED_MIN_VECTORS:
+            # Needs training before vectors can be added, see _train_index
+            return faiss.index_factory(self.vector_dim, _COMPRESSED_INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+        
+        # HNSW graph over fp16 codes, halving the bytes read per distance computation
+        index = faiss.IndexHNSWSQ(self.vector_dim, faiss.ScalarQuantizer.QT_fp16, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+        return index
+    
+    def _train_index(self, index: faiss.Index, embeddings: np.ndarray):
+        """Train quantizers on a random sample of the embeddings (no-op for flat/HNSW)"""
+        if index.is_trained:
             return
         
-        # Extract source language texts
-        texts = []
-        metadata = []
-        
-        for idx, entry in enumerate(data):
-            if source_lang in entry:
-                texts.append(entry[source_lang])
-                metadata.append({
-                    'corpus': corpus_name,
-                    'index': idx,
-                    'translations': entry
-                })
+        if len(embeddings) > _COMPRESSED_TRAIN_SAMPLE:
+            rows = np.random.default_rng(0).choice(len(embeddings), _COMPRESSED_TRAIN_SAMPLE, replace=False)
+            sample = embeddings[np.sort(rows)]
+        else:
+            sample = embeddings
+        index.train(sample)
+    
+    @staticmethod
+    def _set_search_params(index: faiss.Index):
+        """Apply query-time parameters that are not persisted with the index"""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = _COMPRESSED_NPROBE
+    
+    def _load_index(self, path: str) -> faiss.Index:
+        """Memory-map a saved index read-only instead of copying it into RAM.
         
-        if not texts:
-            logger.warning(f"No texts found for language {source_lang} in corpus {corpus_name}")
+        Inverted lists of IVF indexes are paged in on demand, and processes that
+        open the same file share its pages through the OS page cache.
+        """
+        index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        self._set_search_params(index)
+        return index
+    
+    @functools.cached_property
+    def _gpu_resources(self):
+        """FAISS GPU memory and stream resources, created with the first GPU index"""
+        return faiss.StandardGpuResources()
+    
+    def _to_device(self, index: faiss.Index) -> faiss.Index:
+        """Move a CPU index onto the GPU(s) when running on CUDA with faiss-gpu"""
+        num_gpus = faiss.get_num_gpus()
+        if self._device != 'cuda' or num_gpus == 0:
+            return index
+        
+        try:
+            if num_gpus > 1:
+                return faiss.index_cpu_to_all_gpus(index)
+            return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+        except RuntimeError as e:
+            # Not every index type has a GPU implementation (e.g. HNSW)
+            logger.warning(f"Keeping {type(index).__name__} on CPU: {e}")
+            return index
+    
+    def build_vector_index(self, corpus_name: str, source_lang: str = 'en'):
+        """Build FAISS vector index for a corpus"""
+        logger.info(f"Building vector index for {corpus_name}...")
+        
+        prepared = self._prepare_corpus(corpus_name, source_lang)
+        if prepared is None:
             return
+        columns, rows, texts = prepared
         
         # Generate embeddings
         logger.info(f"Generating embeddings for {len(texts)} texts...")
-        embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
+        embeddings = self._encode_bulk(texts, cache_key=corpus_name)
+        self._finalize_index(corpus_name, columns, rows, embeddings)
+    
+    def build_vector_indexes(self, corpus_names: List[str], source_lang: str = 'en'):
+        """Build FAISS vector indexes for several corpora, encoding each distinct phrase once"""
+        logger.info(f"Building vector indexes for {len(corpus_names)} corpora...")
+        
+        # Overlap the corpus file reads
+        cpu_count = os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=min(8, cpu_count, max(1, len(corpus_names)))) as executor:
+            loaded = executor.map(lambda corpus_name: self._prepare_corpus(corpus_name, source_lang), corpus_names)
+            prepared = {corpus_name: corpus for corpus_name, corpus in zip(corpus_names, loaded) if corpus is not None}
+        if not prepared:
+            return
         
-        # Create FAISS index
-        index = faiss.IndexFlatIP(self.vector_dim)  # Inner product for cosine similarity
+        # Phrases such as "Absolutely killed it" recur across domains; give each
+        # distinct phrase one row of a shared embedding matrix
+        phrase_to_id = {}
+        row_ids = {}
+        for corpus_name, (_, _, texts) in prepared.items():
+            row_ids[corpus_name] = np.array([phrase_to_id.setdefault(text, len(phrase_to_id)) for text in texts], dtype=np.int64)
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
-        index.add(embeddings.astype('float32'))
+        logger.info(f"Generating embeddings for {len(phrase_to_id)} unique texts...")
+        # One pass over every corpus, so batches can be larger than a single corpus
+        all_embeddings = self._encode_bulk(list(phrase_to_id), cache_key='all_corpora', batch_size=256)
+        
+        # FAISS add/write release the GIL, so finalize corpora concurrently; split
+        # OpenMP threads between workers so FAISS doesn't oversubscribe the cores
+        max_workers = min(8, cpu_count, len(prepared))
+        omp_threads = faiss.omp_get_max_threads()
+        faiss.omp_set_num_threads(max(1, cpu_count // max_workers))
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self._finalize_index, corpus_name, columns, rows, self._take_rows(all_embeddings, row_ids[corpus_name]))
+                    for corpus_name, (columns, rows, _) in prepared.items()
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            faiss.omp_set_num_threads(omp_threads)
+    
+    def _prepare_corpus(self, corpus_name: str, source_lang: str) -> Optional[Tuple[Dict[str, np.ndarray], np.ndarray, List[str]]]:
+        """Load a corpus and pick out the rows and texts to index for source_lang"""
+        columns = self.load_corpus_columns(corpus_name)
+        if not columns:
+            logger.warning(f"No data found for corpus {corpus_name}")
+            return None
+        
+        # Extract source language texts
+        source = columns.get(source_lang, np.empty(0, dtype=object))
+        rows = np.flatnonzero(np.not_equal(source, None))
+        texts = source[rows].tolist()
+        
+        if not texts:
+            logger.warning(f"No texts found for language {source_lang} in corpus {corpus_name}")
+            return None
+        return columns, rows, texts
+    
+    def _finalize_index(self, corpus_name: str, columns: Dict[str, np.ndarray], rows: np.ndarray,
+                        embeddings: np.ndarray):
+        """Index the corpus embeddings, store the index with its metadata and save both to disk"""
+        # FAISS needs C-contiguous float32; a no-op for what _encode_bulk returns
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        # Create FAISS index (embeddings are already normalized for cosine similarity)
+        index = self._make_index(len(embeddings))
+        self._train_index(index, embeddings)
+        index.add(embeddings)
+        self._set_search_params(index)
         
         # Store index and metadata
-        self.indexes[corpus_name] = index
-        self.metadata[corpus_name] = metadata
+        metadata = self._build_metadata_table(rows, {lang: column[rows] for lang, column in columns.items()})
+        self._set_corpus_index(corpus_name, index, metadata)
         
         # Save to disk
         index_path = os.path.join(self.corpus_dir, f"{corpus_name}_index.faiss")
-        metadata_path = os.path.join(self.corpus_dir, f"{corpus_name}_metadata.pkl")
+        metadata_path = os.path.join(self.corpus_dir, f"{corpus_name}_metadata.parquet")
         
         faiss.write_index(index, index_path)
-        with open(metadata_path, 'wb') as f:
-            pickle.dump(metadata, f)
+        pq.write_table(metadata, metadata_path, compression='zstd')
         
         logger.info(f"Vector index built for {corpus_name} with {index.ntotal} vectors")
     
     def load_vector_index(self, corpus_name: str):
         """Load vector index from disk"""
         index_path = os.path.join(self.corpus_dir, f"{corpus_name}_index.faiss")
-        metadata_path = os.path.join(self.corpus_dir, f"{corpus_name}_metadata.pkl")
+        metadata_path = os.path.join(self.corpus_dir, f"{corpus_name}_metadata.parquet")
+        
+        # Indexes saved before the parquet metadata format keep a pickled list of dicts
+        legacy_path = os.path.join(self.corpus_dir, f"{corpus_name}_metadata.pkl")
+        if os.path.exists(index_path) and not os.path.exists(metadata_path) and os.path.exists(legacy_path):
+            self._migrate_legacy_metadata(legacy_path, metadata_path)
         
         if os.path.exists(index_path) and os.path.exists(metadata_path):
-            self.indexes[corpus_name] = faiss.read_index(index_path)
-            with open(metadata_path, 'rb') as f:
-                self.metadata[corpus_name] = pickle.load(f)
+            self._set_corpus_index(corpus_name, self._load_index(index_path), pq.read_table(metadata_path, memory_map=True))
             return True
         return False
     
+    def _migrate_legacy_metadata(self, legacy_path: str, metadata_path: str):
+        """Rewrite pickled per-row metadata dicts as the parquet table load_vector_index reads"""
+        with open(legacy_path, 'rb') as f:
+            entries = pickle.load(f)
+        
+        languages = list(dict.fromkeys(lang for entry in entries for lang in entry['translations']))
+        rows = np.array([entry['index'] for entry in entries], dtype=np.int64)
+        columns = {
+            lang: np.array([entry['translations'].get(lang) for entry in entries], dtype=object)
+            for lang in languages
+        }
+        pq.write_table(self._build_metadata_table(rows, columns), metadata_path, compression='zstd')
+        logger.info(f"Migrated {legacy_path} to {metadata_path}")
+    
+    def _ensure_index(self, corpus_name: str) -> bool:
+        """Make sure a corpus index is loaded, building it from the corpus JSON when none is saved.
+        
+        Corpora outside _CORPUS_SOURCES (e.g. medical_large) are never built by
+        initialize_all_corpora, so their first search builds them.
+        """
+        if corpus_name in self.indexes:
+            return True
+        # One loader per process, so concurrent first searches don't build it twice
+        with self._index_build_lock:
+            if corpus_name in self.indexes or self.load_vector_index(corpus_name):
+                return True
+            if not os.path.exists(os.path.join(self.corpus_dir, f"{corpus_name}.json")):
+                return False
+            self.build_vector_index(corpus_name)
+            return corpus_name in self.indexes
+    
+    def _set_corpus_index(self, corpus_name: str, index: faiss.Index, metadata: pa.Table):
+        """Install a corpus index with its metadata and drop state derived from the old one"""
+        self._host_indexes[corpus_name] = index
+        self.indexes[corpus_name] = self._to_device(index)
+        self._meta_tables[corpus_name] = metadata
+        if 0 < index.ntotal < _HNSW_MIN_VECTORS:
+            self._top1_matrices[corpus_name] = self._index_vectors(index)
+        else:
+            self._top1_matrices.pop(corpus_name, None)
+        self._corpus_languages[corpus_name] = frozenset(
+            name for name in metadata.column_names
+            if name != 'index' and metadata.column(name).null_count < metadata.num_rows
+        )
+        self._global_index = None
+        self._rendered_examples.clear()
+        with self._context_hits_lock:
+            self._context_hits.clear()
+    
+    @staticmethod
+    def _build_metadata_table(rows: np.ndarray, columns: Dict[str, np.ndarray]) -> pa.Table:
+        """Columnar metadata: each entry's corpus row plus one string column per language"""
+        table = {'index': pa.array(rows, type=pa.int32())}
+        for lang, column in columns.items():
+            table[lang] = pa.array(column, type=pa.string())
+        return pa.table(table)
+    
+    def _metadata_rows(self, corpus_name: str, rows: np.ndarray) -> List[Dict]:
+        """Materialize metadata dicts for only the given index rows of a corpus"""
+        # Gather column-wise and build one small dict per requested row
+        taken = self._meta_tables[corpus_name].take(rows).to_pydict()
+        indices = taken.pop('index')
+        languages = list(taken.items())
+        return [
+            {
+                'corpus': corpus_name,
+                'index': idx,
+                'translations': {lang: texts[i] for lang, texts in languages if texts[i] is not None}
+            }
+            for i, idx in enumerate(indices)
+        ]
+    
     def search_similar_texts(self, query: str, corpus_name: str = None, k: int = 5) -> List[Dict]:
         """Search for similar texts in corpus"""
-        if corpus_name and corpus_name not in self.indexes:
-            if not self.load_vector_index(corpus_name):
-                return []
+        return self.search_batch([query], corpus_name, k)[0]
+    
+    def search_batch(self, queries: List[str], corpus_name: str = None, k: int = 5) -> List[List[Dict]]:
+        """Search for similar texts for several queries at once, one result list per query"""
+        if corpus_name and not self._ensure_index(corpus_name):
+            return [[] for _ in queries]
+        
+        # Encode all queries together, normalized the same way as the indexed vectors
+        query_embeddings = self.encode_queries(queries, out=self._query_buffer(len(queries)))
+        return self.search_vectors(query_embeddings, corpus_name, k)
+    
+    def find_similar_by_vector(self, embedding: np.ndarray, corpus_name: str = None, top_k: int = 5) -> List[Dict]:
+        """Search with one query vector from encode_queries, skipping the encoder"""
+        return self.search_vectors(np.asarray(embedding, dtype=np.float32).reshape(1, -1), corpus_name, top_k)[0]
+    
+    def search_vectors(self, query_embeddings: np.ndarray, corpus_name: str = None, k: int = 5) -> List[List[Dict]]:
+        """Search with already encoded query vectors (float32 rows from encode_queries)"""
+        if corpus_name and not self._ensure_index(corpus_name):
+            return [[] for _ in query_embeddings]
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query], convert_to_numpy=True)
-        faiss.normalize_L2(query_embedding)
+        # Without a corpus, search every loaded corpus through the merged index
+        if not corpus_name:
+            return self._search_global(query_embeddings, k)
         
+        if k == 1:
+            scores, rows = self.top1(query_embeddings, corpus_name)
+            scores, indices = scores[:, None], rows[:, None]
+        else:
+            # Search in FAISS index, all queries in one call
+            scores, indices = self.indexes[corpus_name].search(query_embeddings, k)
+        
+        # Collect results
         results = []
+        for query_scores, query_indices in zip(scores, indices):
+            # FAISS pads with -1 when the corpus holds fewer than k vectors
+            hits = query_indices >= 0
+            query_results = self._metadata_rows(corpus_name, query_indices[hits])
+            for result, score in zip(query_results, query_scores[hits]):
+                result['similarity_score'] = float(score)
+                result['corpus_name'] = corpus_name
+            results.append(query_results)
+        return results
+    
+    def top1(self, query_embeddings: np.ndarray, corpus_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Best score and row per query in a loaded corpus, row -1 when the corpus is empty"""
+        matrix = self._top1_matrices.get(corpus_name)
+        if matrix is None:
+            scores, rows = self.indexes[corpus_name].search(query_embeddings, 1)
+            return scores[:, 0], rows[:, 0]
+        
+        # Small corpora: one matmul and an argmax instead of FAISS' top-k heap
+        all_scores = query_embeddings @ matrix.T
+        rows = all_scores.argmax(axis=1)
+        return all_scores[np.arange(len(rows)), rows], rows
+    
+    def _search_global(self, query_embeddings: np.ndarray, k: int) -> List[List[Dict]]:
+        """Search all loaded corpora with one FAISS call, results already ranked by score"""
+        index = self._get_global_index()
+        if index is None:
+            return [[] for _ in query_embeddings]
         
-        # Search in specific corpus or all corpora
-        corpora_to_search = [corpus_name] if corpus_name else list(self.indexes.keys())
+        scores, ids = index.search(query_embeddings, k)
         
-        for corpus in corpora_to_search:
-            if corpus not in self.indexes:
-                continue
-                
-            # Search in FAISS index
-            scores, indices = self.indexes[corpus].search(query_embedding.astype('float32'), k)
-            
-            # Collect results
-            for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.metadata[corpus]):
-                    result = self.metadata[corpus][idx].copy()
-                    result['similarity_score'] = float(score)
-                    result['corpus_name'] = corpus
-                    results.append(result)
-        
-        # Sort by similarity score
-        results.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return results[:k]
+        # Flatten the hits of every query (row-major, so each query's hits stay
+        # contiguous and in FAISS' score order), dropping the -1 padding
+        hits = ids >= 0
+        hit_scores, hit_ids = scores[hits], ids[hits]
+        corpus_ids = hit_ids >> _CORPUS_ID_SHIFT
+        rows = hit_ids & _ROW_MASK
+        
+        # One metadata gather per corpus for the whole batch
+        hit_results = [None] * len(hit_ids)
+        for corpus_id in np.unique(corpus_ids):
+            corpus = self._corpus_names[corpus_id]
+            positions = np.flatnonzero(corpus_ids == corpus_id)
+            for position, result in zip(positions, self._metadata_rows(corpus, rows[positions])):
+                result['similarity_score'] = float(hit_scores[position])
+                result['corpus_name'] = corpus
+                hit_results[position] = result
+        
+        # Split back into one list per query
+        results = []
+        start = 0
+        for count in hits.sum(axis=1):
+            results.append(hit_results[start:start + count])
+            start += count
+        return results
+    
+    def _get_global_index(self) -> Optional[faiss.Index]:
+        """Merge the vectors of every loaded corpus into one IndexIDMap2, if not done yet"""
+        with self._global_lock:
+            if self._global_index is None and self.indexes:
+                stamps = self._index_stamps()
+                global_index = self._load_global_index(stamps)
+                if global_index is None:
+                    global_index = self._build_global_index(stamps)
+                self._global_index = self._to_device(global_index)
+            return self._global_index
+    
+    def _index_stamps(self) -> Dict[str, Optional[float]]:
+        """Modification time of each loaded corpus' index file, used to spot stale merges"""
+        stamps = {}
+        for corpus_name in self.indexes:
+            index_path = os.path.join(self.corpus_dir, f"{corpus_name}_index.faiss")
+            stamps[corpus_name] = os.path.getmtime(index_path) if os.path.exists(index_path) else None
+        return stamps
+    
+    def _load_global_index(self, stamps: Dict[str, Optional[float]]) -> Optional[faiss.Index]:
+        """Memory-map the saved merged index, if it was built from the current corpus indexes"""
+        index_path = os.path.join(self.corpus_dir, "all_corpora_index.faiss")
+        meta_path = os.path.join(self.corpus_dir, "all_corpora_meta.json")
+        if not (os.path.exists(index_path) and os.path.exists(meta_path)):
+            return None
+        
+        meta = _read_json(meta_path)
+        if None in stamps.values() or meta.get('stamps') != stamps:
+            return None
+        
+        self._corpus_names = meta['corpora']
+        self._corpus_ids = {name: i for i, name in enumerate(self._corpus_names)}
+        return self._load_index(index_path)
+    
+    def _build_global_index(self, stamps: Dict[str, Optional[float]]) -> faiss.Index:
+        """Build the merged index from the loaded corpus indexes and save it next to them"""
+        vectors = []
+        ids = []
+        for corpus_name, index in self._host_indexes.items():
+            if corpus_name not in self._corpus_ids:
+                self._corpus_ids[corpus_name] = len(self._corpus_names)
+                self._corpus_names.append(corpus_name)
+            vectors.append(self._index_vectors(index))
+            ids.append((self._corpus_ids[corpus_name] << _CORPUS_ID_SHIFT) | np.arange(index.ntotal, dtype=np.int64))
+        
+        all_vectors = np.concatenate(vectors)
+        global_index = faiss.IndexIDMap2(self._make_index(len(all_vectors)))
+        self._train_index(global_index, all_vectors)
+        global_index.add_with_ids(all_vectors, np.concatenate(ids))
+        self._set_search_params(global_index)
+        
+        # Only persist merges of saved indexes, so a reload can check it is still current
+        if None not in stamps.values():
+            faiss.write_index(global_index, os.path.join(self.corpus_dir, "all_corpora_index.faiss"))
+            _write_json(os.path.join(self.corpus_dir, "all_corpora_meta.json"), {'corpora': self._corpus_names, 'stamps': stamps})
+        return global_index
+    
+    @staticmethod
+    def _index_vectors(index: faiss.Index) -> np.ndarray:
+        """Read the stored vectors back out of a corpus index"""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.make_direct_map()
+        return index.reconstruct_n(0, index.ntotal)
     
     def get_context_examples(self, query: str, target_language: str, max_examples: int = 3) -> str:
         """Get context examples for translation"""
-        similar_texts = self.search_similar_texts(query, k=max_examples * 2)
+        # No loaded corpus covers the language: skip encoding and searching altogether
+        if not any(target_language in languages for languages in self._corpus_languages.values()):
+            return ""
+        
+        similar_texts = self._context_search(query, max_examples * 2)
         
         context_examples = []
         for result in similar_texts:
-            translations = result.get('translations', {})
-            if 'en' in translations and target_language in translations:
-                example = f"English: \"{translations['en']}\"\n{self.get_language_name(target_language)}: \"{translations[target_language]}\""
+            example = self._render_example(result, target_language)
+            if example:
                 context_examples.append(example)
                 
                 if len(context_examples) >= max_examples:
@@ -657,44 +1103,58 @@ class CorpusManager:
             return "Translation examples:\n" + "\n\n".join(context_examples) + "\n\n"
         return ""
     
+    def _context_search(self, query: str, k: int) -> List[Dict]:
+        """Top k hits across all corpora, served from a cached search of at least _CONTEXT_HITS_K"""
+        with self._context_hits_lock:
+            cached = self._context_hits.get(query)
+            if cached is not None and cached[0] >= k:
+                self._context_hits.move_to_end(query)
+                return cached[1][:k]
+        
+        # Search outside the lock so concurrent requests are not serialized
+        k_searched = max(k, _CONTEXT_HITS_K)
+        hits = self.search_similar_texts(query, k=k_searched)
+        with self._context_hits_lock:
+            self._context_hits[query] = (k_searched, hits)
+            self._context_hits.move_to_end(query)
+            while len(self._context_hits) > _CONTEXT_CACHE_SIZE:
+                self._context_hits.popitem(last=False)
+        return hits[:k]
+    
+    def _render_example(self, result: Dict, target_language: str) -> str:
+        """English/target example pair for a search hit, rendered once per corpus row"""
+        key = (result['corpus_name'], result['index'], target_language)
+        example = self._rendered_examples.get(key)
+        if example is None:
+            translations = result.get('translations', {})
+            if 'en' in translations and target_language in translations:
+                example = f"English: \"{translations['en']}\"\n{self.get_language_name(target_language)}: \"{translations[target_language]}\""
+            else:
+                example = ''
+            self._rendered_examples[key] = example
+        return example
+    
     def get_language_name(self, code: str) -> str:
         """Get full language name from code"""
-        language_names = {
-            'es': 'Spanish',
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ja': 'Japanese',
-            'ko': 'Korean',
-            'zh': 'Chinese',
-            'ar': 'Arabic',
-            'hi': 'Hindi',
-            'ur': 'Urdu',
-            'ru': 'Russian',
-            'nl': 'Dutch',
-            'sv': 'Swedish',
-            'no': 'Norwegian',
-            'da': 'Danish',
-            'pl': 'Polish',
-            'tr': 'Turkish',
-            'he': 'Hebrew',
-            'th': 'Thai',
-            'vi': 'Vietnamese'
-        }
-        return language_names.get(code, code)
+        return _LANGUAGE_NAMES.get(code, code)
     
     def initialize_all_corpora(self):
         """Initialize all corpora with sample data and build indexes"""
         logger.info("Initializing all corpora...")
         
+        # Searches follow initialization, so load the encoder while corpora are read
+        self.preload_encoder()
+        
         # Create sample corpora if they don't exist
         self.create_sample_corpora()
         
-        # Build vector indexes for all corpora
-        for corpus_name in self.corpus_sources.keys():
-            if not self.load_vector_index(corpus_name):
-                self.build_vector_index(corpus_name)
+        # Build vector indexes for all corpora that are not on disk yet
+        missing = [name for name in self.corpus_sources.keys() if not self.load_vector_index(name)]
+        if missing:
+            self.build_vector_indexes(missing)
+        
+        # Merge the corpora now so the first unfiltered search doesn't pay for it
+        self._get_global_index()
         
         logger.info("All corpora initialized successfully")
     
@@ -702,12 +1162,11 @@ class CorpusManager:
         """Get statistics about all corpora"""
         stats = {}
         for corpus_name in self.corpus_sources.keys():
-            data = self.load_corpus(corpus_name)
             stats[corpus_name] = {
                 'name': self.corpus_sources[corpus_name]['name'],
                 'description': self.corpus_sources[corpus_name]['description'],
                 'domain': self.corpus_sources[corpus_name]['domain'],
-                'entries': len(data),
+                'entries': self.corpus_size(corpus_name),
                 'indexed': corpus_name in self.indexes
             }
         return stats
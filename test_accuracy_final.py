@@ -3,10 +3,21 @@ Final working translation accuracy test for GeoSpeak
 """
 
 from corpus_manager import CorpusManager
+import argparse
 import logging
 import os
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-def test_geospeak_accuracy():
+# Domain classification stops searching for a query once a hit scores above this
+EARLY_EXIT_SCORE = 0.9
+
+def _name_overlap(query, corpus_name):
+    """Words shared by a query and a corpus name, used to pick which corpora to search first"""
+    return len(set(query.lower().split()) & set(corpus_name.lower().split('_')))
+
+def test_geospeak_accuracy(early_exit=True):
     """Test translation accuracy with proper error handling"""
     
     logging.basicConfig(level=logging.WARNING)
@@ -15,7 +26,7 @@ def test_geospeak_accuracy():
     print('='*60)
     
     # Initialize
-    cm = CorpusManager()
+    cm = CorpusManager(persist_query_embeddings=True)
     
     # Test corpora
     test_corpora = ['legal_formal', 'medical_terminology', 'business_common', 'travel_tourism']
@@ -42,8 +53,11 @@ def test_geospeak_accuracy():
         print('❌ No corpora loaded successfully')
         return
     
-    print(f'\\n🎯 Domain Classification Testing:')
-    print('-'*50)
+    # Report lines for both test sections, written out in one call at the end
+    report = [
+        f'\\n🎯 Domain Classification Testing:',
+        '-'*50,
+    ]
     
     # Test queries with expected domains
     domain_tests = [
@@ -57,27 +71,59 @@ def test_geospeak_accuracy():
     
     correct_classifications = 0
     total_tests = 0
-    
-    for query, expected_corpus in domain_tests:
-        print(f'\\n🔍 \"{query}\"')
+    domain_of = {corpus_name: info['domain'] for corpus_name, info in cm.corpus_sources.items()}
+    
+    # Encode every test query in one batch; the searches below reuse the cached
+    # query embeddings
+    queries = [query for query, _ in domain_tests]
+    cm.encode_queries(queries)
+    
+    # FAISS releases the GIL while searching, so the corpora are searched concurrently
+    pool = ThreadPoolExecutor(max_workers=min(len(loaded_corpora), os.cpu_count() or 1))
+    
+    # Each query visits the corpora most likely to match first (word overlap with the
+    # corpus name) and, with early_exit, stops once a hit scores above EARLY_EXIT_SCORE.
+    # Every round searches each corpus once for all queries visiting it.
+    corpus_order = [sorted(loaded_corpora, key=lambda corpus_name: -_name_overlap(query, corpus_name)) for query in queries]
+    corpus_index = {corpus_name: i for i, corpus_name in enumerate(loaded_corpora)}
+    # (queries x corpora) top-1 scores, -inf where a corpus was not searched or had no hit
+    score_matrix = np.full((len(queries), len(loaded_corpora)), -np.inf, dtype=np.float32)
+    top_hits = {}
+    pending = list(range(len(queries)))
+    for round_idx in range(len(loaded_corpora)):
+        visiting = {}
+        for query_idx in pending:
+            visiting.setdefault(corpus_order[query_idx][round_idx], []).append(query_idx)
+        futures = {
+            corpus_name: pool.submit(cm.search_batch, [queries[query_idx] for query_idx in query_idxs], corpus_name, 1)
+            for corpus_name, query_idxs in visiting.items()
+        }
         
-        best_score = -1
-        best_corpus = None
-        best_result = None
-        
-        # Test against all loaded corpora
-        for corpus_name in loaded_corpora:
+        for corpus_name, future in futures.items():
             try:
-                results = cm.search_similar_texts(query, corpus_name, k=1)
-                if results:
-                    score = results[0].get('similarity_score', 0)
-                    if score > best_score:
-                        best_score = score
-                        best_corpus = corpus_name
-                        best_result = results[0]
+                corpus_results = future.result()
             except Exception as e:
-                print(f'   Error with {corpus_name}: {e}')
+                report.append(f'   Error with {corpus_name}: {e}')
                 continue
+            for query_idx, results in zip(visiting[corpus_name], corpus_results):
+                if results:
+                    score_matrix[query_idx, corpus_index[corpus_name]] = results[0].get('similarity_score', 0)
+                    top_hits[query_idx, corpus_index[corpus_name]] = results[0]
+        
+        if early_exit:
+            pending = [query_idx for query_idx in pending if score_matrix[query_idx].max() <= EARLY_EXIT_SCORE]
+            if not pending:
+                break
+    
+    best_corpus_idx = score_matrix.argmax(axis=1)
+    
+    for query_idx, (query, expected_corpus) in enumerate(domain_tests):
+        report.append(f'\\n🔍 \"{query}\"')
+        
+        corpus_idx = best_corpus_idx[query_idx]
+        best_score = float(score_matrix[query_idx, corpus_idx])
+        best_result = top_hits.get((query_idx, corpus_idx))
+        best_corpus = loaded_corpora[corpus_idx]
         
         total_tests += 1
         
@@ -86,36 +132,43 @@ def test_geospeak_accuracy():
             if is_correct:
                 correct_classifications += 1
             
-            domain = cm.corpus_sources[best_corpus]['domain']
+            domain = domain_of[best_corpus]
             status = '✅' if is_correct else '⚠️ '
             
-            print(f'   {status} {best_corpus} ({domain}) - Score: {best_score:.3f}')
-            print(f'      Match: "{best_result.get("text", "N/A")}"')
+            report.append(f'   {status} {best_corpus} ({domain}) - Score: {best_score:.3f}')
+            report.append(f'      Match: "{best_result.get("text", "N/A")}"')
             
             # Show translations if available
             translations = best_result.get('translations', {})
             if 'es' in translations:
-                print(f'      Spanish: "{translations["es"]}"')
+                report.append(f'      Spanish: "{translations["es"]}"')
         else:
-            print('   ❌ No matches found')
+            report.append('   ❌ No matches found')
     
-    print(f'\\n📊 Translation Quality Testing:')
-    print('-'*40)
+    report.append(f'\\n📊 Translation Quality Testing:')
+    report.append('-'*40)
     
     # Test translation consistency within each corpus
-    for corpus_name in loaded_corpora[:2]:  # Test first 2 corpora
-        print(f'\\n📚 {corpus_name}:')
+    quality_corpora = loaded_corpora[:2]  # Test first 2 corpora
+    quality_entries = {corpus_name: cm.corpora[corpus_name]['data'][:2] for corpus_name in quality_corpora}  # Test first 2 entries
+    
+    # Search for similar entries (should find itself and others), one batch per corpus on the same pool
+    quality_futures = {
+        corpus_name: pool.submit(cm.search_batch, [entry['en'] for entry in entries], corpus_name, 3)
+        for corpus_name, entries in quality_entries.items()
+    }
+    
+    for corpus_name in quality_corpora:
+        report.append(f'\\n📚 {corpus_name}:')
         
-        data = cm.corpora[corpus_name]['data']
-        test_entries = data[:2]  # Test first 2 entries
+        test_entries = quality_entries[corpus_name]
         
         for i, entry in enumerate(test_entries):
             en_text = entry['en']
-            print(f'   Test {i+1}: "{en_text}"')
+            report.append(f'   Test {i+1}: "{en_text}"')
             
             try:
-                # Search for similar entries (should find itself and others)
-                results = cm.search_similar_texts(en_text, corpus_name, k=3)
+                results = quality_futures[corpus_name].result()[i]
                 
                 if results:
                     # Check the top matches
@@ -123,24 +176,27 @@ def test_geospeak_accuracy():
                         score = result.get('similarity_score', 0)
                         matched_text = result.get('text', 'N/A')
                         
-                        print(f'     Match {j+1}: {score:.3f} - "{matched_text}"')
+                        report.append(f'     Match {j+1}: {score:.3f} - "{matched_text}"')
                         
                         # Compare Spanish translations
                         orig_es = entry.get('es', '')
                         match_es = result.get('translations', {}).get('es', '')
                         
                         if orig_es and match_es:
-                            print(f'       Original ES: "{orig_es}"')
-                            print(f'       Matched ES:  "{match_es}"')
+                            report.append(f'       Original ES: "{orig_es}"')
+                            report.append(f'       Matched ES:  "{match_es}"')
                             
                             # Check if it's an exact match or similar
                             if orig_es.lower().strip() == match_es.lower().strip():
-                                print('       ✅ Exact translation match')
+                                report.append('       ✅ Exact translation match')
                             else:
-                                print('       📝 Different translation')
+                                report.append('       📝 Different translation')
                 
             except Exception as e:
-                print(f'     Error: {e}')
+                report.append(f'     Error: {e}')
+    
+    pool.shutdown()
+    sys.stdout.write('\n'.join(report) + '\n')
     
     print(f'\\n🏆 FINAL RESULTS:')
     print('='*40)
@@ -174,5 +230,10 @@ def test_geospeak_accuracy():
     }
 
 if __name__ == '__main__':
-    results = test_geospeak_accuracy()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--no-early-exit', action='store_true',
+                        help='search every corpus for every query, even after a confident hit')
+    args = parser.parse_args()
+    
+    results = test_geospeak_accuracy(early_exit=not args.no_early_exit)
     print(f'\\n✨ Test completed successfully!')
@@ -4,23 +4,101 @@ Evaluates translation quality across different domains and languages
 """
 
 import os
+import re
+import sys
+import functools
 import json
 import pandas as pd
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
 from typing import List, Dict, Tuple, Optional
 from corpus_manager import CorpusManager
 import time
+from collections import Counter
+
+try:
+    import simsimd
+except ImportError:  # optional: SIMD cosine kernel, numpy is used otherwise
+    simsimd = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster results output, the stdlib json is used otherwise
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # optional: compiled n-gram matching, Counter is used otherwise
+    njit = None
 
 logger = logging.getLogger(__name__)
 
+# Word tokens for the BLEU-like score
+_TOKEN_RE = re.compile(r'\w+')
+
+def _ngram_overlaps_counter(ref_tokens: List[str], cand_tokens: List[str]) -> Tuple[float, float]:
+    """Clipped 1-gram and 2-gram precision of the candidate against the reference"""
+    overlap_1 = sum((Counter(ref_tokens) & Counter(cand_tokens)).values()) / len(cand_tokens)
+    
+    if len(ref_tokens) > 1 and len(cand_tokens) > 1:
+        ref_2grams = Counter(zip(ref_tokens, ref_tokens[1:]))
+        cand_2grams = Counter(zip(cand_tokens, cand_tokens[1:]))
+        overlap_2 = sum((ref_2grams & cand_2grams).values()) / (len(cand_tokens) - 1)
+    else:
+        overlap_2 = 0.0
+    return overlap_1, overlap_2
+
+if njit is not None:
+    @njit(cache=True)
+    def _clipped_matches(ref: np.ndarray, cand: np.ndarray) -> int:
+        """Number of candidate ids matched by reference ids, each id at most as often as in ref"""
+        ref = np.sort(ref)
+        cand = np.sort(cand)
+        i = j = matches = 0
+        while i < len(ref) and j < len(cand):
+            if ref[i] == cand[j]:
+                matches += 1
+                i += 1
+                j += 1
+            elif ref[i] < cand[j]:
+                i += 1
+            else:
+                j += 1
+        return matches
+    
+    def _ngram_overlaps(ref_tokens: List[str], cand_tokens: List[str]) -> Tuple[float, float]:
+        """Same as _ngram_overlaps_counter, on integer token ids in compiled code"""
+        vocab = {}
+        ref_ids = np.array([vocab.setdefault(token, len(vocab)) for token in ref_tokens], dtype=np.int64)
+        cand_ids = np.array([vocab.setdefault(token, len(vocab)) for token in cand_tokens], dtype=np.int64)
+        overlap_1 = _clipped_matches(ref_ids, cand_ids) / len(cand_ids)
+        
+        if len(ref_ids) > 1 and len(cand_ids) > 1:
+            # A 2-gram (a, b) becomes the single id a * |vocab| + b
+            size = len(vocab)
+            ref_2grams = ref_ids[:-1] * size + ref_ids[1:]
+            cand_2grams = cand_ids[:-1] * size + cand_ids[1:]
+            overlap_2 = _clipped_matches(ref_2grams, cand_2grams) / (len(cand_ids) - 1)
+        else:
+            overlap_2 = 0.0
+        return overlap_1, overlap_2
+else:
+    _ngram_overlaps = _ngram_overlaps_counter
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity of two embedding vectors, computed in float32"""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    if simsimd is not None:
+        return 1.0 - float(simsimd.cosine(a, b))
+    return float(np.dot(a, b) / np.sqrt(np.dot(a, a) * np.dot(b, b)))
+
 class TranslationAccuracyTester:
     def __init__(self, corpus_dir="./corpus_data"):
-        self.corpus_manager = CorpusManager(corpus_dir)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.multilingual_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        self.corpus_manager = CorpusManager(corpus_dir, persist_query_embeddings=True)
+        # Corpora whose data and vector index are loaded, shared by all tests
+        self._loaded = set()
         
         # Test languages
         self.test_languages = ['es', 'fr', 'de', 'ur']
@@ -79,46 +157,70 @@ class TranslationAccuracyTester:
             ]
         }
         
+    @functools.cached_property
+    def embedding_model(self) -> SentenceTransformer:
+        """Same-language similarity model, loaded on first use"""
+        return self._load_model('all-MiniLM-L6-v2')
+    
+    @functools.cached_property
+    def multilingual_model(self) -> SentenceTransformer:
+        """Cross-language similarity model, loaded only if a cross-language pair is scored"""
+        return self._load_model('paraphrase-multilingual-MiniLM-L12-v2')
+    
+    @staticmethod
+    def _load_model(name: str) -> SentenceTransformer:
+        """Load a sentence encoder, in half precision when it runs on the GPU"""
+        model = SentenceTransformer(name)
+        if model.device.type == 'cuda':
+            model.half()
+        return model
+    
+    def _ensure(self, corpus_name: str) -> bool:
+        """Load a corpus and its vector index, once per tester"""
+        if corpus_name not in self._loaded:
+            self.corpus_manager.load_corpus(corpus_name)
+            if self.corpus_manager.load_vector_index(corpus_name):
+                self._loaded.add(corpus_name)
+        return corpus_name in self._loaded
+    
     def calculate_semantic_similarity(self, text1: str, text2: str, lang1='en', lang2='en') -> float:
         """Calculate semantic similarity between two texts using multilingual embeddings"""
         try:
             # Use multilingual model for cross-language similarity
-            if lang1 != lang2:
-                embeddings = self.multilingual_model.encode([text1, text2])
-            else:
-                embeddings = self.embedding_model.encode([text1, text2])
+            model = self.multilingual_model if lang1 != lang2 else self.embedding_model
+            embeddings = model.encode([text1, text2], convert_to_numpy=True).astype(np.float32, copy=False)
             
-            similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
-            return float(similarity)
+            return _cosine(embeddings[0], embeddings[1])
         except Exception as e:
             logger.error(f"Error calculating similarity: {e}")
             return 0.0
     
+    def calculate_semantic_similarities(self, pairs: List[Tuple[str, str]], lang1='en', lang2='en') -> np.ndarray:
+        """Semantic similarity of many (text1, text2) pairs, encoding all texts in one batch"""
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        try:
+            model = self.multilingual_model if lang1 != lang2 else self.embedding_model
+            texts = [text for pair in pairs for text in pair]
+            embeddings = model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+            # fp16 encoder output is accumulated in float32
+            embeddings = embeddings.astype(np.float32, copy=False).reshape(len(pairs), 2, -1)
+            return np.einsum('nd,nd->n', embeddings[:, 0], embeddings[:, 1])
+        except Exception as e:
+            logger.error(f"Error calculating similarity: {e}")
+            return np.zeros(len(pairs), dtype=np.float32)
+    
     def calculate_bleu_score_simple(self, reference: str, candidate: str) -> float:
-        """Simple BLEU-like score based on n-gram overlap"""
-        import re
-        
+        """Simple BLEU-like score based on clipped n-gram overlap"""
         # Simple tokenization
-        ref_tokens = re.findall(r'\w+', reference.lower())
-        cand_tokens = re.findall(r'\w+', candidate.lower())
+        ref_tokens = _TOKEN_RE.findall(reference.lower())
+        cand_tokens = _TOKEN_RE.findall(candidate.lower())
         
         if not ref_tokens or not cand_tokens:
             return 0.0
         
-        # Calculate 1-gram, 2-gram overlap
-        ref_1grams = set(ref_tokens)
-        cand_1grams = set(cand_tokens)
-        
-        overlap_1 = len(ref_1grams & cand_1grams) / max(len(cand_1grams), 1)
-        
-        # 2-grams
-        ref_2grams = set(zip(ref_tokens[:-1], ref_tokens[1:]))
-        cand_2grams = set(zip(cand_tokens[:-1], cand_tokens[1:]))
-        
-        if ref_2grams and cand_2grams:
-            overlap_2 = len(ref_2grams & cand_2grams) / max(len(cand_2grams), 1)
-        else:
-            overlap_2 = 0.0
+        # Clipped 1-gram and 2-gram precision
+        overlap_1, overlap_2 = _ngram_overlaps(ref_tokens, cand_tokens)
         
         # Simple geometric mean
         if overlap_1 > 0 and overlap_2 > 0:
@@ -142,8 +244,7 @@ class TranslationAccuracyTester:
         
         # Load corpus
         try:
-            self.corpus_manager.load_corpus(corpus_name)
-            self.corpus_manager.load_vector_index(corpus_name)
+            self._ensure(corpus_name)
         except Exception as e:
             results['errors'].append(f"Failed to load corpus: {e}")
             return results
@@ -155,13 +256,16 @@ class TranslationAccuracyTester:
         test_cases = self.ground_truth_tests[domain]
         results['test_cases_count'] = len(test_cases)
         
-        all_semantic_scores = []
-        all_bleu_scores = []
+        total_semantic = total_bleu = 0.0
+        total_count = 0
         
+        # Encode each English test sentence once; every language below reuses it
+        en_texts = [test_case['en'] for test_case in test_cases]
+        en_embeddings = dict(zip(en_texts, self.corpus_manager.encode_queries(en_texts)))
+        
+        # First pass: find the corpus translation for every (language, test case)
+        pairs = []
         for lang in self.test_languages:
-            lang_semantic_scores = []
-            lang_bleu_scores = []
-            
             for test_case in test_cases:
                 if lang not in test_case:
                     continue
@@ -171,43 +275,54 @@ class TranslationAccuracyTester:
                 
                 # Find similar translation in corpus
                 try:
-                    similar_entries = self.corpus_manager.find_similar(en_text, corpus_name, top_k=3)
+                    similar_entries = self.corpus_manager.find_similar_by_vector(en_embeddings[en_text], corpus_name, top_k=3)
                     
                     if similar_entries:
                         best_match = similar_entries[0]
                         corpus_translation = best_match['translations'].get(lang, '')
                         
                         if corpus_translation:
-                            # Calculate semantic similarity
-                            semantic_score = self.calculate_semantic_similarity(
-                                ground_truth, corpus_translation, lang, lang
-                            )
-                            lang_semantic_scores.append(semantic_score)
-                            all_semantic_scores.append(semantic_score)
-                            
-                            # Calculate BLEU-like score
-                            bleu_score = self.calculate_bleu_score_simple(ground_truth, corpus_translation)
-                            lang_bleu_scores.append(bleu_score)
-                            all_bleu_scores.append(bleu_score)
-                            
-                            logger.debug(f"Test: {en_text}")
-                            logger.debug(f"Ground truth ({lang}): {ground_truth}")
-                            logger.debug(f"Corpus translation ({lang}): {corpus_translation}")
-                            logger.debug(f"Semantic: {semantic_score:.3f}, BLEU: {bleu_score:.3f}")
+                            pairs.append((lang, en_text, ground_truth, corpus_translation))
                         
                 except Exception as e:
                     results['errors'].append(f"Error testing {en_text} -> {lang}: {e}")
+        
+        # Score all pairs with one encoder call (both sides share a language)
+        semantic_scores = self.calculate_semantic_similarities(
+            [(ground_truth, corpus_translation) for _, _, ground_truth, corpus_translation in pairs]
+        )
+        
+        lang_scores = {}
+        for (lang, en_text, ground_truth, corpus_translation), semantic_score in zip(pairs, semantic_scores):
+            semantic_score = float(semantic_score)
             
-            if lang_semantic_scores:
-                results['language_scores'][lang] = {
-                    'semantic_similarity': np.mean(lang_semantic_scores),
-                    'bleu_score': np.mean(lang_bleu_scores),
-                    'test_count': len(lang_semantic_scores)
-                }
+            # Calculate BLEU-like score
+            bleu_score = self.calculate_bleu_score_simple(ground_truth, corpus_translation)
+            
+            # Running [semantic_sum, bleu_sum, count] per language
+            sums = lang_scores.setdefault(lang, [0.0, 0.0, 0])
+            sums[0] += semantic_score
+            sums[1] += bleu_score
+            sums[2] += 1
+            total_semantic += semantic_score
+            total_bleu += bleu_score
+            total_count += 1
+            
+            logger.debug(f"Test: {en_text}")
+            logger.debug(f"Ground truth ({lang}): {ground_truth}")
+            logger.debug(f"Corpus translation ({lang}): {corpus_translation}")
+            logger.debug(f"Semantic: {semantic_score:.3f}, BLEU: {bleu_score:.3f}")
+        
+        for lang, (semantic_sum, bleu_sum, count) in lang_scores.items():
+            results['language_scores'][lang] = {
+                'semantic_similarity': semantic_sum / count,
+                'bleu_score': bleu_sum / count,
+                'test_count': count
+            }
         
-        if all_semantic_scores:
-            results['average_semantic_similarity'] = np.mean(all_semantic_scores)
-            results['average_bleu_score'] = np.mean(all_bleu_scores)
+        if total_count:
+            results['average_semantic_similarity'] = total_semantic / total_count
+            results['average_bleu_score'] = total_bleu / total_count
         
         return results
     
@@ -220,8 +335,7 @@ class TranslationAccuracyTester:
         
         for corpus_name in test_corpora:
             try:
-                self.corpus_manager.load_corpus(corpus_name)
-                self.corpus_manager.load_vector_index(corpus_name)
+                self._ensure(corpus_name)
             except Exception as e:
                 logger.error(f"Failed to load {corpus_name}: {e}")
         
@@ -244,34 +358,40 @@ class TranslationAccuracyTester:
         }
         
         correct_classifications = 0
+        domain_of = {corpus_name: info['domain'] for corpus_name, info in self.corpus_manager.corpus_sources.items()}
+        
+        # Encode every query once and search each corpus with all of them, filling a
+        # (queries x corpora) matrix of top-1 scores; -inf marks a missing score
+        searched_corpora = [corpus_name for corpus_name in test_corpora if corpus_name in self._loaded]
+        score_matrix = np.full((len(test_queries), len(searched_corpora)), -np.inf, dtype=np.float32)
+        if test_queries and searched_corpora:
+            query_embeddings = self.corpus_manager.encode_queries(test_queries)
+            for corpus_idx, corpus_name in enumerate(searched_corpora):
+                try:
+                    scores, rows = self.corpus_manager.top1(query_embeddings, corpus_name)
+                    score_matrix[:, corpus_idx] = np.where(rows >= 0, scores, -np.inf)
+                except Exception as e:
+                    logger.error(f"Error testing queries on {corpus_name}: {e}")
+        
+        best_corpus_idx = score_matrix.argmax(axis=1) if searched_corpora else np.zeros(len(test_queries), dtype=np.int64)
         
-        for query in test_queries:
+        for query_idx, query in enumerate(test_queries):
             query_results = {
                 'query': query,
-                'corpus_scores': {},
+                'corpus_scores': {
+                    corpus_name: float(score)
+                    for corpus_name, score in zip(searched_corpora, score_matrix[query_idx])
+                    if np.isfinite(score)
+                },
                 'best_match': None,
                 'expected_domain': expected_domains.get(query, 'unknown')
             }
             
-            best_score = 0
-            best_corpus = None
-            
-            for corpus_name in test_corpora:
-                if corpus_name in self.corpus_manager.corpora:
-                    try:
-                        matches = self.corpus_manager.find_similar(query, corpus_name, top_k=1)
-                        if matches:
-                            score = matches[0]['similarity']
-                            query_results['corpus_scores'][corpus_name] = score
-                            
-                            if score > best_score:
-                                best_score = score
-                                best_corpus = corpus_name
-                    except Exception as e:
-                        logger.error(f"Error testing query '{query}' on {corpus_name}: {e}")
-            
-            if best_corpus:
-                predicted_domain = self.corpus_manager.corpus_sources[best_corpus]['domain']
+            # Only a positive similarity counts as a match
+            best_score = float(score_matrix[query_idx, best_corpus_idx[query_idx]]) if searched_corpora else 0.0
+            if best_score > 0:
+                best_corpus = searched_corpora[best_corpus_idx[query_idx]]
+                predicted_domain = domain_of[best_corpus]
                 query_results['best_match'] = {
                     'corpus': best_corpus,
                     'domain': predicted_domain,
@@ -317,15 +437,24 @@ class TranslationAccuracyTester:
         retrieval_results = self.test_corpus_retrieval_accuracy(test_queries)
         
         # Calculate overall metrics
-        overall_semantic = np.mean([r['average_semantic_similarity'] for r in domain_results if r['average_semantic_similarity'] > 0])
-        overall_bleu = np.mean([r['average_bleu_score'] for r in domain_results if r['average_bleu_score'] > 0])
+        semantic_sum = bleu_sum = 0.0
+        semantic_count = bleu_count = 0
+        for r in domain_results:
+            if r['average_semantic_similarity'] > 0:
+                semantic_sum += r['average_semantic_similarity']
+                semantic_count += 1
+            if r['average_bleu_score'] > 0:
+                bleu_sum += r['average_bleu_score']
+                bleu_count += 1
+        overall_semantic = semantic_sum / semantic_count if semantic_count else 0.0
+        overall_bleu = bleu_sum / bleu_count if bleu_count else 0.0
         
         final_results = {
             'test_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
             'test_duration_seconds': time.time() - start_time,
             'overall_metrics': {
-                'semantic_similarity': float(overall_semantic) if not np.isnan(overall_semantic) else 0.0,
-                'bleu_score': float(overall_bleu) if not np.isnan(overall_bleu) else 0.0,
+                'semantic_similarity': overall_semantic,
+                'bleu_score': overall_bleu,
                 'domain_classification_accuracy': retrieval_results['domain_classification_accuracy']
             },
             'domain_results': domain_results,
@@ -342,24 +471,32 @@ class TranslationAccuracyTester:
     
     def save_results(self, results: Dict, filename: str = 'translation_accuracy_results.json'):
         """Save test results to file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            # UTF-8 output, with numpy scores serialized natively
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
         logger.info(f"Results saved to {filename}")
     
     def print_summary(self, results: Dict):
         """Print a human-readable summary of test results"""
-        print("\n" + "="*80)
-        print("🧪 GEOSPEAK TRANSLATION ACCURACY TEST RESULTS")
-        print("="*80)
+        # Collected and written in one call rather than a print per line
+        lines = [
+            "\n" + "="*80,
+            "🧪 GEOSPEAK TRANSLATION ACCURACY TEST RESULTS",
+            "="*80,
+        ]
         
         overall = results['overall_metrics']
-        print(f"⏱️  Test Duration: {results['test_duration_seconds']:.2f} seconds")
-        print(f"📊 Overall Semantic Similarity: {overall['semantic_similarity']:.3f}")
-        print(f"📝 Overall BLEU Score: {overall['bleu_score']:.3f}")
-        print(f"🎯 Domain Classification Accuracy: {overall['domain_classification_accuracy']:.3f}")
+        lines.append(f"⏱️  Test Duration: {results['test_duration_seconds']:.2f} seconds")
+        lines.append(f"📊 Overall Semantic Similarity: {overall['semantic_similarity']:.3f}")
+        lines.append(f"📝 Overall BLEU Score: {overall['bleu_score']:.3f}")
+        lines.append(f"🎯 Domain Classification Accuracy: {overall['domain_classification_accuracy']:.3f}")
         
-        print(f"\n📚 Domain-Specific Results:")
-        print("-" * 50)
+        lines.append(f"\n📚 Domain-Specific Results:")
+        lines.append("-" * 50)
         
         for domain_result in results['domain_results']:
             domain = domain_result['domain']
@@ -367,16 +504,16 @@ class TranslationAccuracyTester:
             bleu_score = domain_result['average_bleu_score']
             test_count = domain_result['test_cases_count']
             
-            print(f"🏥 {domain.upper()}: Semantic={sem_score:.3f}, BLEU={bleu_score:.3f} ({test_count} tests)")
+            lines.append(f"🏥 {domain.upper()}: Semantic={sem_score:.3f}, BLEU={bleu_score:.3f} ({test_count} tests)")
             
             for lang, scores in domain_result['language_scores'].items():
                 sem = scores['semantic_similarity']
                 bleu = scores['bleu_score']
                 count = scores['test_count']
-                print(f"   └─ {lang}: {sem:.3f}/{bleu:.3f} ({count} tests)")
+                lines.append(f"   └─ {lang}: {sem:.3f}/{bleu:.3f} ({count} tests)")
         
-        print(f"\n🔍 Corpus Retrieval Test:")
-        print("-" * 50)
+        lines.append(f"\n🔍 Corpus Retrieval Test:")
+        lines.append("-" * 50)
         
         retrieval = results['retrieval_results']
         for query_result in retrieval['retrieval_results']:
@@ -386,15 +523,17 @@ class TranslationAccuracyTester:
                 score = query_result['best_match']['score']
                 expected = query_result['expected_domain']
                 status = "✅" if domain == expected else "❌"
-                print(f"{status} \"{query}\" → {domain} ({score:.3f})")
+                lines.append(f"{status} \"{query}\" → {domain} ({score:.3f})")
         
-        print(f"\n🏆 System Configuration:")
-        print("-" * 50)
+        lines.append(f"\n🏆 System Configuration:")
+        lines.append("-" * 50)
         sys_info = results['system_info']
-        print(f"Total Corpora: {sys_info['total_corpora']}")
-        print(f"Languages Tested: {', '.join(sys_info['languages_tested'])}")
-        print(f"Embedding Model: {sys_info['embedding_model']}")
-        print("="*80)
+        lines.append(f"Total Corpora: {sys_info['total_corpora']}")
+        lines.append(f"Languages Tested: {', '.join(sys_info['languages_tested'])}")
+        lines.append(f"Embedding Model: {sys_info['embedding_model']}")
+        lines.append("="*80)
+        sys.stdout.write("\n".join(lines) + "\n")
+
 
 def main():
     """Main testing function"""